@@ -37,16 +37,24 @@ from qgis.core import (
     QgsGeometry,
     QgsFields,
     QgsField,
-    QgsPointXY,
 )
 from qgis.PyQt.QtCore import QVariant
 
-from .src.reader import lit_med_champs
+from .src.reader import lit_med_champs_cache
 from .src.io_mh_sm_exchange import mh_vers_sm_val, sm_vers_mh_raster, NODATA_MH
 
 
 NODATA_TIF = float(NODATA_MH)
 
+# GeoTIFF tuilé et compressé : écriture par blocs, accès efficace par le cache GDAL
+OPTIONS_GEOTIFF = [
+    "TILED=YES",
+    "BLOCKXSIZE=512",
+    "BLOCKYSIZE=512",
+    "COMPRESS=DEFLATE",
+    "NUM_THREADS=ALL_CPUS",
+]
+
 
 def journal(message, niveau=Qgis.Info):
     """
@@ -91,6 +99,49 @@ def afficher_raster_qgis(chemin):
     return couche
 
 
+def wkb_triangles(points, triangles):
+    """
+    Encode tous les triangles d'un maillage en polygones WKB, en une seule passe numpy.
+
+    Chaque triangle devient un polygone à un anneau de 4 points (le premier
+    sommet est répété pour fermer l'anneau). Tous les enregistrements ont la
+    même taille, ce qui permet de découper le résultat sans parsing.
+
+    Paramètres
+    ----------
+    points : np.ndarray
+        Coordonnées des points (N, 3) ou (N, 2).
+    triangles : np.ndarray
+        Indices des triangles (M, 3).
+
+    Retour
+    ------
+    tuple[bytes, int]
+        wkb : concaténation des M polygones WKB (little endian)
+        taille : taille en octets d'un polygone
+    """
+    triangles = np.asarray(triangles)
+    xy = np.asarray(points)[:, :2]
+
+    type_wkb = np.dtype([
+        ("ordre", "u1"),
+        ("type", "<u4"),
+        ("nb_anneaux", "<u4"),
+        ("nb_points", "<u4"),
+        ("xy", "<f8", (4, 2)),
+    ])
+
+    enr = np.empty(len(triangles), dtype=type_wkb)
+    enr["ordre"] = 1
+    enr["type"] = 3
+    enr["nb_anneaux"] = 1
+    enr["nb_points"] = 4
+    enr["xy"][:, :3, :] = xy[triangles]
+    enr["xy"][:, 3, :] = enr["xy"][:, 0, :]
+
+    return enr.tobytes(), type_wkb.itemsize
+
+
 def apercu_med_triangles_qgis(chemin_med, nom_couche="MED triangles preview"):
     """
     Crée une couche mémoire de polygones représentant les triangles d'un fichier MED.
@@ -115,7 +166,7 @@ def apercu_med_triangles_qgis(chemin_med, nom_couche="MED triangles preview"):
     if not chemin_med or not os.path.isfile(chemin_med):
         raise RuntimeError("Chemin MED invalide")
 
-    points, triangles, champs_tri, champs_pts = lit_med_champs(chemin_med)
+    points, triangles, champs_tri, champs_pts = lit_med_champs_cache(chemin_med)
 
     couche = QgsVectorLayer("Polygon", nom_couche, "memory")
     prov = couche.dataProvider()
@@ -125,29 +176,30 @@ def apercu_med_triangles_qgis(chemin_med, nom_couche="MED triangles preview"):
     prov.addAttributes(champs)
     couche.updateFields()
 
+    # Phase numpy : toutes les géométries sont encodées avant de toucher à QGIS
+    wkb, taille = wkb_triangles(points, triangles)
+
+    # Phase QGIS : uniquement la création des objets Qt, puis un seul ajout en
+    # bloc, signaux coupés pour éviter les invalidations de la couche
+    champs_couche = couche.fields()
     entites = []
-    for ident, tri in enumerate(triangles):
-        ia, ib, ic = tri
-
-        a = points[ia]
-        b = points[ib]
-        c = points[ic]
-
-        anneau = [
-            QgsPointXY(float(a[0]), float(a[1])),
-            QgsPointXY(float(b[0]), float(b[1])),
-            QgsPointXY(float(c[0]), float(c[1])),
-            QgsPointXY(float(a[0]), float(a[1])),
-        ]
-
-        entite = QgsFeature(couche.fields())
-        entite.setAttribute("id", int(ident))
-        entite.setGeometry(QgsGeometry.fromPolygonXY([anneau]))
+    for ident in range(len(triangles)):
+        geom = QgsGeometry()
+        geom.fromWkb(wkb[ident * taille:(ident + 1) * taille])
+
+        entite = QgsFeature(champs_couche)
+        entite.setAttributes([ident])
+        entite.setGeometry(geom)
         entites.append(entite)
 
-    prov.addFeatures(entites)
-    couche.updateExtents()
+    couche.blockSignals(True)
+    try:
+        prov.addFeatures(entites)
+        couche.updateExtents()
+    finally:
+        couche.blockSignals(False)
 
+    couche.triggerRepaint()
     QgsProject.instance().addMapLayer(couche)
     journal("Aperçu MED ajouté " + str(chemin_med), Qgis.Info)
     return couche
@@ -178,7 +230,8 @@ def ecrire_geotiff(raster, gt, chemin_sortie, epsg=None, nodata=NODATA_TIF):
     nb_lignes, nb_colonnes = raster.shape
 
     driver = gdal.GetDriverByName("GTiff")
-    ds = driver.Create(chemin_sortie, nb_colonnes, nb_lignes, 1, gdal.GDT_Float32)
+    ds = driver.Create(chemin_sortie, nb_colonnes, nb_lignes, 1, gdal.GDT_Float32,
+                       options=OPTIONS_GEOTIFF)
     ds.SetGeoTransform(gt)
 
     if epsg is not None:
@@ -189,10 +242,21 @@ def ecrire_geotiff(raster, gt, chemin_sortie, epsg=None, nodata=NODATA_TIF):
     bande = ds.GetRasterBand(1)
     bande.SetNoDataValue(float(nodata))
 
-    data = raster.astype(np.float32, copy=True)
-    data[~np.isfinite(data)] = float(nodata)
+    # Écriture par bandes de la hauteur d'une tuile : on ne convertit jamais
+    # tout le raster d'un coup, seulement une bande à la fois.
+    # Une bande déjà en float32 sans NaN est écrite telle quelle, sans copie.
+    # Le remplacement NaN/inf vers nodata se fait en place sur la copie float32.
+    _, hauteur_bloc = bande.GetBlockSize()
+    for yoff in range(0, nb_lignes, hauteur_bloc):
+        data = raster[yoff:yoff + hauteur_bloc, :]
+        if data.dtype != np.float32:
+            data = np.nan_to_num(data.astype(np.float32), copy=False,
+                                 nan=nodata, posinf=nodata, neginf=nodata)
+        elif not np.isfinite(data).all():
+            data = np.nan_to_num(data, copy=True, nan=nodata, posinf=nodata, neginf=nodata)
+
+        bande.WriteArray(data, xoff=0, yoff=yoff)
 
-    bande.WriteArray(data)
     bande.FlushCache()
     ds.FlushCache()
     ds = None
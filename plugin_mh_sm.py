@@ -31,12 +31,14 @@ Fonctionnalités
 
 import os
 import tempfile
+import time
 import traceback
+from functools import lru_cache
 
 import numpy as np
 from osgeo import gdal, osr
 
-from qgis.PyQt.QtCore import QCoreApplication
+from qgis.PyQt.QtCore import QCoreApplication, QTimer
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtWidgets import QAction, QMessageBox
 from qgis.core import QgsMessageLog, Qgis, QgsRasterLayer, QgsProject
@@ -47,21 +49,103 @@ from .visu_pyvista import visualiser_med_pyvista
 from .src.io_mh_sm_exchange import (
     mh_vers_sm_val,
     lire_mh_ascii,
-    lire_scene_triangle_cir,
-    aligner_par_bbox,
+    cle_fichier,
+    mapping_cir_cache,
     ecrire_mh_ascii,
+    lire_val,
+    moyenne_triangles_par_pixel,
     NODATA_MH,
 )
-from .src.mapping import mapping_surface
 
 
 NODATA_TIF = float(NODATA_MH)
 
+# GeoTIFF tuilé et compressé : écriture par blocs, accès efficace par le cache GDAL
+OPTIONS_GEOTIFF = [
+    "TILED=YES",
+    "BLOCKXSIZE=512",
+    "BLOCKYSIZE=512",
+    "COMPRESS=DEFLATE",
+    "NUM_THREADS=ALL_CPUS",
+]
+
+# Dossier GDAL en mémoire des GeoTIFF de comparaison non écrits sur disque
+DOSSIER_VSIMEM = "/vsimem/mh_sm"
+
+
+class _JournalDiffere:
+    """
+    Tampon des messages du journal QGIS du plugin.
+
+    Chaque appel à QgsMessageLog fait travailler la boucle d'événements Qt.
+    Les messages sont donc accumulés et écrits au plus une fois par délai,
+    regroupés par niveau. Les messages critiques sont écrits immédiatement.
+    """
+
+    def __init__(self, delai=0.1):
+        """
+        Paramètres
+        ----------
+        delai : float
+            Délai minimal entre deux écritures, en secondes.
+        """
+        self.delai = float(delai)
+        self.en_attente = []
+        self.dernier = 0.0
+        self.programme = False
+
+    def ajouter(self, message, niveau):
+        """
+        Ajoute un message au tampon et l'écrit si le délai est écoulé.
+
+        Paramètres
+        ----------
+        message : str
+            Texte à afficher.
+        niveau : Qgis.MessageLevel
+            Niveau du message.
+        """
+        self.en_attente.append((str(message), niveau))
+
+        if niveau == Qgis.Critical or time.monotonic() - self.dernier > self.delai:
+            self.vider()
+        elif not self.programme:
+            self.programme = True
+            QTimer.singleShot(int(self.delai * 1000), self.vider)
+
+    def vider(self):
+        """
+        Écrit tous les messages en attente, un appel par suite de messages
+        de même niveau.
+        """
+        self.programme = False
+        self.dernier = time.monotonic()
+
+        en_attente, self.en_attente = self.en_attente, []
+
+        lignes = []
+        niveau_courant = None
+        for message, niveau in en_attente:
+            if lignes and niveau != niveau_courant:
+                QgsMessageLog.logMessage("\n".join(lignes), "mh_sm_plugin", niveau_courant)
+                lignes = []
+            lignes.append(message)
+            niveau_courant = niveau
+
+        if lignes:
+            QgsMessageLog.logMessage("\n".join(lignes), "mh_sm_plugin", niveau_courant)
+
+
+_JOURNAL = _JournalDiffere()
+
 
 def journal(message, niveau=Qgis.Info):
     """
     Écrit un message dans le journal QGIS du plugin.
 
+    L'écriture peut être différée de quelques dixièmes de seconde, voir
+    _JournalDiffere.
+
     Paramètres
     ----------
     message : str
@@ -69,10 +153,7 @@ def journal(message, niveau=Qgis.Info):
     niveau : Qgis.MessageLevel
         Niveau du message : Qgis.Info, Qgis.Warning, Qgis.Critical.
     """
-    try:
-        QgsMessageLog.logMessage(str(message), "mh_sm_plugin", niveau)
-    except Exception:
-        pass
+    _JOURNAL.ajouter(message, niveau)
 
 
 def epsg_depuis_raster(chemin_raster):
@@ -88,9 +169,35 @@ def epsg_depuis_raster(chemin_raster):
     ------
     int ou None
         Code EPSG si disponible, sinon None.
+
+    Remarque
+    --------
+    Le résultat est mis en cache tant que le fichier ne change pas sur disque
+    (voir _epsg_cache).
     """
     try:
-        ds = gdal.Open(chemin_raster)
+        return _epsg_cache(cle_fichier(chemin_raster))
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=8)
+def _epsg_cache(cle_raster):
+    """
+    Lit l'EPSG d'un raster via GDAL, une seule fois par version du fichier.
+
+    Paramètres
+    ----------
+    cle_raster : tuple
+        Clé du raster, voir cle_fichier.
+
+    Retour
+    ------
+    int ou None
+        Code EPSG si disponible, sinon None.
+    """
+    try:
+        ds = gdal.Open(cle_raster[0])
         if ds is None:
             return None
 
@@ -131,7 +238,8 @@ def ecrire_geotiff(ras, gt, chemin_sortie, epsg=None, nodata=NODATA_TIF):
     nb_lignes, nb_colonnes = ras.shape
 
     driver = gdal.GetDriverByName("GTiff")
-    ds = driver.Create(chemin_sortie, nb_colonnes, nb_lignes, 1, gdal.GDT_Float32)
+    ds = driver.Create(chemin_sortie, nb_colonnes, nb_lignes, 1, gdal.GDT_Float32,
+                       options=OPTIONS_GEOTIFF)
     ds.SetGeoTransform(gt)
 
     if epsg is not None:
@@ -142,10 +250,21 @@ def ecrire_geotiff(ras, gt, chemin_sortie, epsg=None, nodata=NODATA_TIF):
     band = ds.GetRasterBand(1)
     band.SetNoDataValue(float(nodata))
 
-    data = ras.astype(np.float32, copy=True)
-    data[~np.isfinite(data)] = float(nodata)
+    # Écriture par bandes de la hauteur d'une tuile : on ne convertit jamais
+    # tout le raster d'un coup, seulement une bande à la fois.
+    # Une bande déjà en float32 sans NaN est écrite telle quelle, sans copie.
+    # Le remplacement NaN/inf vers nodata se fait en place sur la copie float32.
+    _, hauteur_bloc = band.GetBlockSize()
+    for yoff in range(0, nb_lignes, hauteur_bloc):
+        data = ras[yoff:yoff + hauteur_bloc, :]
+        if data.dtype != np.float32:
+            data = np.nan_to_num(data.astype(np.float32), copy=False,
+                                 nan=nodata, posinf=nodata, neginf=nodata)
+        elif not np.isfinite(data).all():
+            data = np.nan_to_num(data, copy=True, nan=nodata, posinf=nodata, neginf=nodata)
+
+        band.WriteArray(data, xoff=0, yoff=yoff)
 
-    band.WriteArray(data)
     band.FlushCache()
     ds.FlushCache()
     ds = None
@@ -175,45 +294,68 @@ def ajouter_raster_qgis(chemin, nom):
     return couche
 
 
-def lire_val(chemin_val):
+@lru_cache(maxsize=2)
+def _raster_mh_cache(cle_mh):
+    """
+    Lit (ou récupère) un raster MH ASCII complet.
+
+    Un raster peut être volumineux : seuls les deux derniers sont gardés.
+    Le tableau est en lecture seule car partagé, et en float32 : il ne sert
+    qu'à la grille, à la comparaison et aux GeoTIFF float32 (écrits sans
+    conversion), jamais au calcul des .val.
+
+    Paramètres
+    ----------
+    cle_mh : tuple
+        Clé du raster MH, voir cle_fichier.
+
+    Retour
+    ------
+    tuple[np.ndarray, tuple, float]
+        ras (float32), gt, nodata (comme lire_mh_ascii).
+    """
+    ras, gt, nodata = lire_mh_ascii(cle_mh[0], dtype=np.float32)
+    ras.setflags(write=False)
+    return ras, gt, nodata
+
+
+def lire_mh_cache(chemin):
     """
-    Lit un fichier .val et renvoie les valeurs des triangles dans l'ordre.
+    Lit un raster MH ASCII en passant par le cache du plugin.
 
     Paramètres
     ----------
-    chemin_val : str
-        Chemin du fichier .val.
+    chemin : str
+        Chemin du raster MH (.txt ou .asc).
 
     Retour
     ------
-    np.ndarray
-        Valeurs par triangle dans l'ordre du fichier scene_triangle.cir.
+    tuple[np.ndarray, tuple, float]
+        ras (lecture seule), gt, nodata.
     """
-    valeurs = []
+    return _raster_mh_cache(cle_fichier(chemin))
 
-    with open(chemin_val, "r", errors="ignore") as f:
-        lignes = [l.strip() for l in f if l.strip()]
 
-    if not lignes:
-        return np.asarray([], dtype=float)
+@lru_cache(maxsize=4)
+def _grille_cache(cle_mh):
+    """
+    Lit (ou récupère) la grille d'un raster MH de référence.
 
-    i = 1
-    while i < len(lignes):
-        s = lignes[i]
-        if s.startswith("f"):
-            nb = int(s.split()[1])
-            i += 1
-            for _ in range(nb):
-                v = float(lignes[i].replace("\t", " ").split()[0])
-                valeurs.append(v)
-                i += 1
-        else:
-            i += 1
+    Paramètres
+    ----------
+    cle_mh : tuple
+        Clé du raster MH de référence, voir cle_fichier.
 
-    return np.asarray(valeurs, dtype=float)
+    Retour
+    ------
+    tuple[tuple, tuple, float]
+        forme_ras, gt, nodata.
+    """
+    ras_ref, gt, nodata = _raster_mh_cache(cle_mh)
+    return ras_ref.shape, tuple(float(v) for v in gt), float(nodata)
 
 
-def sm_vers_mh_raster(mh_txt_ref, cir, val_path):
+def sm_vers_mh_raster(mh_txt_ref, cir, val_path, *, preloaded=None):
     """
     Reconstruit un raster MH à partir d'un fichier .val.
 
@@ -221,6 +363,9 @@ def sm_vers_mh_raster(mh_txt_ref, cir, val_path):
     -------
     - On récupère la grille à partir du raster MH de référence.
     - On calcule le mapping pixel triangle via intersection géométrique.
+      La grille et le mapping sont mis en cache (voir _grille_cache et
+      mapping_cir_cache) : un second appel avec le même raster et le même .cir
+      ne relit que le .val.
     - Pour chaque pixel, on calcule la moyenne des valeurs des triangles
       qui intersectent le pixel.
 
@@ -232,44 +377,41 @@ def sm_vers_mh_raster(mh_txt_ref, cir, val_path):
         Fichier scene_triangle.cir.
     val_path : str
         Fichier .val d'entrée.
+    preloaded : tuple ou None
+        (ras_ref, gt, nodata) déjà renvoyé par lire_mh_ascii(mh_txt_ref).
+        Si fourni, le raster de référence n'est pas relu.
 
     Retour
     ------
     tuple[np.ndarray, tuple, float]
-        ras_rec : raster reconstruit, NaN sur les pixels non couverts
+        ras_rec : raster reconstruit en float32, NaN sur les pixels non couverts
         gt : geotransform
         nodata : valeur nodata de référence
     """
-    ras_ref, gt, nodata = lire_mh_ascii(mh_txt_ref)
-    _, pts, tri = lire_scene_triangle_cir(cir)
+    if preloaded is None:
+        forme_ras, gt, nodata = _grille_cache(cle_fichier(mh_txt_ref))
+    else:
+        ras_ref, gt, nodata = preloaded
+        forme_ras, gt, nodata = ras_ref.shape, tuple(float(v) for v in gt), float(nodata)
 
-    pts2, _ = aligner_par_bbox(pts, gt, ras_ref.shape)
-    map_px = mapping_surface(pts2, tri, gt, ras_ref.shape)
+    (lignes, colonnes, ids_tri, aires), _ = mapping_cir_cache(cir, forme_ras, gt)
 
     val_tri = lire_val(val_path)
 
-    nb_lignes, nb_colonnes = ras_ref.shape
-    ras_rec = np.full((nb_lignes, nb_colonnes), np.nan, dtype=float)
-
-    for (lig, col), lst in map_px.items():
-        if not lst:
-            continue
-
-        vals = []
-        for id_tri, aire in lst:
-            idx = int(id_tri)
-            if 0 <= idx < len(val_tri):
-                vals.append(float(val_tri[idx]))
-
-        if vals:
-            ras_rec[lig, col] = float(np.mean(vals))
+    ras_rec = moyenne_triangles_par_pixel(
+        val_tri, lignes, colonnes, ids_tri, aires, forme_ras, dtype=np.float32
+    )
 
-    return ras_rec, gt, float(nodata)
+    return ras_rec, gt, nodata
 
 
-def carte_erreur(ras_ref, ras_pred):
+def carte_erreur_et_metriques(ras_ref, ras_pred):
     """
-    Calcule la carte d'erreur pixel par pixel.
+    Calcule la carte d'erreur pixel par pixel et des métriques simples
+    sur les pixels valides.
+
+    Le masque des pixels comparables est calculé une seule fois et sert
+    à la fois à la carte d'erreur et aux métriques.
 
     Paramètres
     ----------
@@ -280,52 +422,59 @@ def carte_erreur(ras_ref, ras_pred):
 
     Retour
     ------
-    np.ndarray
-        Raster d'erreur (reconstruit moins référence), NaN sur pixels non comparables.
+    tuple[np.ndarray, dict]
+        err : raster d'erreur (reconstruit moins référence),
+              NaN sur pixels non comparables
+        stats : dict
+            n_valid : nombre de pixels comparés
+            mae : erreur absolue moyenne
+            rmse : racine de l'erreur quadratique moyenne
+            corr : corrélation linéaire
     """
-    err = np.full(ras_ref.shape, np.nan, dtype=float)
     ok = np.isfinite(ras_ref) & np.isfinite(ras_pred)
-    err[ok] = ras_pred[ok] - ras_ref[ok]
-    return err
-
 
-def metriques(ras_ref, ras_pred):
-    """
-    Calcule des métriques simples sur les pixels valides.
+    # Carte d'erreur dans le type des rasters (float32 pour deux rasters
+    # float32), métriques toujours accumulées en float64
+    err = np.full(ras_ref.shape, np.nan, dtype=np.result_type(ras_ref, ras_pred, np.float32))
+    np.subtract(ras_pred, ras_ref, out=err, where=ok)
 
-    Paramètres
-    ----------
-    ras_ref : np.ndarray
-        Raster de référence.
-    ras_pred : np.ndarray
-        Raster reconstruit.
-
-    Retour
-    ------
-    dict
-        n_valid : nombre de pixels comparés
-        mae : erreur absolue moyenne
-        rmse : racine de l'erreur quadratique moyenne
-        corr : corrélation linéaire
-    """
-    ok = np.isfinite(ras_ref) & np.isfinite(ras_pred)
-    n = int(ok.sum())
+    n = int(np.count_nonzero(ok))
     if n == 0:
-        return {"n_valid": 0}
+        return err, {"n_valid": 0}
 
-    r = ras_ref[ok].astype(float)
-    p = ras_pred[ok].astype(float)
-    d = p - r
+    d = err[ok].astype(float, copy=False)
 
     mae = float(np.mean(np.abs(d)))
-    rmse = float(np.sqrt(np.mean(d ** 2)))
-
-    if r.size > 1 and np.std(r) > 0 and np.std(p) > 0:
-        corr = float(np.corrcoef(r, p)[0, 1])
+    rmse = float(np.sqrt(np.dot(d, d) / n))
+
+    # Copies issues de l'indexation booléenne : décalées sur place ci-dessous
+    r = ras_ref[ok].astype(float, copy=False)
+    p = ras_pred[ok].astype(float, copy=False)
+
+    # Pearson à partir des moments : cinq sommes, sans copie centrée. Les
+    # valeurs sont d'abord décalées d'une valeur de référence (le premier
+    # pixel) : la corrélation est inchangée, mais les sommes n'annulent plus
+    # un grand décalage commun (n * somme(r²) - somme(r)² perd sinon tous ses
+    # chiffres significatifs quand le décalage domine l'écart type)
+    r -= r[0]
+    p -= p[0]
+
+    s_r = float(np.sum(r))
+    s_p = float(np.sum(p))
+    var_r = n * float(np.dot(r, r)) - s_r * s_r
+    var_p = n * float(np.dot(p, p)) - s_p * s_p
+
+    if n > 1 and var_r > 0 and var_p > 0:
+        corr = (n * float(np.dot(r, p)) - s_r * s_p) / np.sqrt(var_r * var_p)
+
+        # Seul un dépassement d'arrondi de |corr| au-delà de 1 est ramené à 1
+        if 1.0 < abs(corr) <= 1.0 + 1e-12:
+            corr = np.copysign(1.0, corr)
+        corr = float(corr)
     else:
         corr = float("nan")
 
-    return {"n_valid": n, "mae": mae, "rmse": rmse, "corr": corr}
+    return err, {"n_valid": n, "mae": mae, "rmse": rmse, "corr": corr}
 
 
 class MhSmPlugin:
@@ -351,6 +500,8 @@ class MhSmPlugin:
         self.action = None
         self.menu_nom = self.tr("MH SM Plugin")
         self.dialog = None
+        self.comparaison_memoire = []
+        self.couches_memoire = []
 
     def tr(self, message):
         """
@@ -393,6 +544,14 @@ class MhSmPlugin:
             self.iface.removeToolBarIcon(self.action)
             self.action = None
 
+        # Couches de comparaison retirées puis fichiers /vsimem libérés : ils
+        # resteraient sinon en mémoire jusqu'à la fermeture de QGIS
+        self._liberer_comparaison_memoire()
+        for nom in gdal.ReadDir(DOSSIER_VSIMEM) or []:
+            gdal.Unlink(DOSSIER_VSIMEM + "/" + nom)
+
+        _JOURNAL.vider()
+
     def run(self):
         """
         Ouvre la fenêtre du plugin et connecte les boutons si nécessaire.
@@ -415,20 +574,17 @@ class MhSmPlugin:
         """
         Connecte les boutons de l'interface aux méthodes du plugin.
         """
-        if hasattr(self.dialog, "btn_export"):
-            self.dialog.btn_export.clicked.connect(self._export_mh_vers_sm)
-
-        if hasattr(self.dialog, "btn_reconstruire"):
-            self.dialog.btn_reconstruire.clicked.connect(self._reconstruire_mh)
-
-        if hasattr(self.dialog, "btn_visu_mh"):
-            self.dialog.btn_visu_mh.clicked.connect(self._visu_mh)
-
-        if hasattr(self.dialog, "btn_comparer"):
-            self.dialog.btn_comparer.clicked.connect(self._comparer_rasters)
-
-        if hasattr(self.dialog, "btn_visu_med"):
-            self.dialog.btn_visu_med.clicked.connect(self._visu_med)
+        for nom, slot in (
+            ("btn_export", self._export_mh_vers_sm),
+            ("btn_reconstruire", self._reconstruire_mh),
+            ("btn_visu_mh", self._visu_mh),
+            ("btn_comparer", self._comparer_rasters),
+            ("btn_enregistrer_comparaison", self._enregistrer_comparaison),
+            ("btn_visu_med", self._visu_med),
+        ):
+            bouton = self.dialog.widget(nom)
+            if bouton is not None:
+                bouton.clicked.connect(slot)
 
     def _export_mh_vers_sm(self):
         """
@@ -541,6 +697,10 @@ class MhSmPlugin:
         - base_mh_reconstruit.tif
         - base_mh_erreur.tif
 
+        Si l'écriture sur disque est décochée dans la fenêtre, ces GeoTIFF sont
+        écrits en mémoire (/vsimem) et chargés tels quels dans QGIS. Ils peuvent
+        ensuite être copiés sur disque avec _enregistrer_comparaison.
+
         Affichage
         ---------
         - Un résumé des métriques est affiché dans la barre de message QGIS.
@@ -558,11 +718,11 @@ class MhSmPlugin:
             if not val_in or not os.path.isfile(val_in):
                 raise RuntimeError("Fichier val introuvable")
 
-            ras_ref, gt, _ = lire_mh_ascii(mh)
-            ras_pred, _, _ = sm_vers_mh_raster(mh, cir, val_in)
+            ref = lire_mh_cache(mh)
+            ras_ref, gt, _ = ref
+            ras_pred, _, _ = sm_vers_mh_raster(mh, cir, val_in, preloaded=ref)
 
-            err = carte_erreur(ras_ref, ras_pred)
-            stats = metriques(ras_ref, ras_pred)
+            err, stats = carte_erreur_et_metriques(ras_ref, ras_pred)
 
             texte = (
                 "Résultats comparaison\n\n"
@@ -583,25 +743,38 @@ class MhSmPlugin:
 
             QMessageBox.information(self.iface.mainWindow(), "Comparaison MH / reconstruit", texte)
 
-            journal("Comparaison rasters", Qgis.Info)
-            for k, v in stats.items():
-                journal(str(k) + " " + str(v), Qgis.Info)
+            journal("\n".join(
+                ["Comparaison rasters"] + [str(k) + " " + str(v) for k, v in stats.items()]
+            ), Qgis.Info)
 
             epsg = epsg_depuis_raster(mh)
             dossier = os.path.dirname(val_in) or tempfile.gettempdir()
             base = os.path.splitext(os.path.basename(val_in))[0]
 
-            tif_ref = os.path.join(dossier, base + "_mh_ref.tif")
-            tif_pred = os.path.join(dossier, base + "_mh_reconstruit.tif")
-            tif_err = os.path.join(dossier, base + "_mh_erreur.tif")
+            noms = [base + "_mh_ref.tif", base + "_mh_reconstruit.tif", base + "_mh_erreur.tif"]
+            chemins_disque = [os.path.join(dossier, nom) for nom in noms]
+
+            # Une seule comparaison gardée en mémoire : la précédente (couches
+            # et fichiers /vsimem) est libérée avant d'écrire la nouvelle
+            self._liberer_comparaison_memoire()
+
+            if self.dialog.comparaison_sur_disque():
+                tif_ref, tif_pred, tif_err = chemins_disque
+            else:
+                tif_ref, tif_pred, tif_err = [DOSSIER_VSIMEM + "/" + nom for nom in noms]
+                self.comparaison_memoire = list(zip((tif_ref, tif_pred, tif_err), chemins_disque))
 
             ecrire_geotiff(ras_ref, gt, tif_ref, epsg=epsg, nodata=NODATA_TIF)
             ecrire_geotiff(ras_pred, gt, tif_pred, epsg=epsg, nodata=NODATA_TIF)
             ecrire_geotiff(err, gt, tif_err, epsg=epsg, nodata=NODATA_TIF)
 
-            ajouter_raster_qgis(tif_ref, "MH référence " + base)
-            ajouter_raster_qgis(tif_pred, "MH reconstruit " + base)
-            ajouter_raster_qgis(tif_err, "Erreur " + base)
+            couches = [
+                ajouter_raster_qgis(tif_ref, "MH référence " + base),
+                ajouter_raster_qgis(tif_pred, "MH reconstruit " + base),
+                ajouter_raster_qgis(tif_err, "Erreur " + base),
+            ]
+            if self.comparaison_memoire:
+                self.couches_memoire = [c.id() for c in couches if c is not None]
 
             self.iface.messageBar().pushMessage(
                 "MH SM",
@@ -615,6 +788,56 @@ class MhSmPlugin:
             journal(msg, Qgis.Critical)
             QMessageBox.critical(self.iface.mainWindow(), "Erreur comparaison", msg)
 
+    def _liberer_comparaison_memoire(self):
+        """
+        Libère la comparaison gardée en mémoire (/vsimem).
+
+        Les couches QGIS encore présentes sont retirées du projet avant la
+        suppression des fichiers /vsimem qu'elles lisent.
+        """
+        if self.couches_memoire:
+            projet = QgsProject.instance()
+            ids = [ident for ident in self.couches_memoire if projet.mapLayer(ident) is not None]
+            if ids:
+                projet.removeMapLayers(ids)
+
+        for chemin_mem, _ in self.comparaison_memoire:
+            gdal.Unlink(chemin_mem)
+
+        self.comparaison_memoire = []
+        self.couches_memoire = []
+
+    def _enregistrer_comparaison(self):
+        """
+        Copie sur disque les GeoTIFF de la dernière comparaison gardée en mémoire.
+
+        Les fichiers sont écrits dans le dossier du .val, avec les mêmes noms
+        que lors d'une comparaison écrite directement sur disque.
+        """
+        try:
+            if not self.comparaison_memoire:
+                raise RuntimeError("Aucune comparaison en mémoire à enregistrer")
+
+            for chemin_mem, chemin_disque in self.comparaison_memoire:
+                ds = gdal.Translate(chemin_disque, chemin_mem, format="GTiff",
+                                    creationOptions=OPTIONS_GEOTIFF)
+                if ds is None:
+                    raise RuntimeError("Écriture impossible " + str(chemin_disque))
+                ds = None
+                journal("GeoTIFF enregistré " + str(chemin_disque), Qgis.Info)
+
+            self.iface.messageBar().pushMessage(
+                "MH SM",
+                "Comparaison enregistrée sur disque",
+                level=0,
+                duration=5
+            )
+
+        except Exception:
+            msg = traceback.format_exc()
+            journal(msg, Qgis.Critical)
+            QMessageBox.critical(self.iface.mainWindow(), "Erreur enregistrement", msg)
+
     def _visu_med(self):
         """
         Ouvre une visualisation PyVista du MED (optionnel).
@@ -15,18 +15,64 @@ La logique de traitement est gérée dans le module principal du plugin.
 """
 
 import os
-import traceback
+from functools import lru_cache
 
 from qgis.PyQt import uic
+from qgis.PyQt.QtCore import QSettings
 from qgis.PyQt.QtWidgets import QDialog, QFileDialog, QMessageBox
 from qgis.core import QgsMessageLog, Qgis
 
 
 CHEMIN_UI = os.path.join(os.path.dirname(__file__), "plugin_mh_sm_dialog_base.ui")
-CLASSE_UI, _ = uic.loadUiType(CHEMIN_UI)
 
+# Widgets optionnels du .ui, résolus une seule fois à l'ouverture du dialogue
+NOMS_WIDGETS = (
+    "btn_mh", "btn_cir", "btn_val", "btn_val_in", "btn_med",
+    "line_mh", "line_cir", "line_val", "line_val_in", "line_med",
+    "chk_comparaison_disque",
+    "btn_export", "btn_reconstruire", "btn_comparer", "btn_enregistrer_comparaison",
+    "btn_visu_mh", "btn_visu_med",
+)
 
-class MhSmDialog(QDialog, CLASSE_UI):
+
+@lru_cache(maxsize=4)
+def _charger_ui(chemin, mtime):
+    """
+    Compile un fichier .ui, une seule fois par couple (chemin, date de modification).
+
+    Paramètres
+    ----------
+    chemin : str
+        Chemin du fichier .ui.
+    mtime : float
+        Date de modification du fichier, qui sert uniquement de clé de cache.
+
+    Retour
+    ------
+    type
+        Classe de formulaire renvoyée par uic.loadUiType.
+    """
+    classe, _ = uic.loadUiType(chemin)
+    return classe
+
+
+def classe_ui():
+    """
+    Classe de formulaire générée à partir du fichier .ui.
+
+    Le .ui n'est lu et compilé qu'à la première ouverture du dialogue, pas à
+    l'import du module (chargement de QGIS). Les ouvertures suivantes
+    réutilisent la classe compilée tant que le fichier .ui n'est pas modifié.
+
+    Retour
+    ------
+    type
+        Classe de formulaire renvoyée par uic.loadUiType.
+    """
+    return _charger_ui(CHEMIN_UI, os.path.getmtime(CHEMIN_UI))
+
+
+class MhSmDialog(QDialog):
     """
     Fenêtre principale du plugin.
 
@@ -52,9 +98,21 @@ class MhSmDialog(QDialog, CLASSE_UI):
     Remarque
     --------
     Certains boutons peuvent être absents selon la version du .ui.
-    Dans ce cas, la classe vérifie leur existence avant de connecter les signaux.
+    Les widgets de NOMS_WIDGETS sont rangés une fois dans self._widgets
+    (None si absents) et testés avec "is not None" avant usage.
+    Le formulaire généré est porté par self.ui, les widgets sont accessibles
+    via widget(nom).
     """
 
+    # Boutons de sélection de fichiers et nom de leur handler
+    BOUTONS_FICHIERS = (
+        ("btn_mh", "_choisir_mh"),
+        ("btn_cir", "_choisir_cir"),
+        ("btn_val", "_choisir_val_sortie"),
+        ("btn_val_in", "_choisir_val_entree"),
+        ("btn_med", "_choisir_med"),
+    )
+
     def __init__(self, parent=None):
         """
         Initialise la fenêtre, charge l'UI et connecte les boutons de navigation.
@@ -65,7 +123,14 @@ class MhSmDialog(QDialog, CLASSE_UI):
             Fenêtre parente QGIS, généralement iface.mainWindow().
         """
         super().__init__(parent)
-        self.setupUi(self)
+
+        self.ui = classe_ui()()
+        self.ui.setupUi(self)
+
+        self._widgets = {nom: getattr(self.ui, nom, None) for nom in NOMS_WIDGETS}
+
+        # Boîtes de dialogue fichier, créées au premier clic puis réutilisées
+        self._boites_fichier = {}
 
         self._journal("Dialogue initialisé", Qgis.Info)
 
@@ -78,20 +143,58 @@ class MhSmDialog(QDialog, CLASSE_UI):
         Cette méthode est isolée pour faciliter la lecture et éviter de mélanger
         l'initialisation UI avec la logique des signaux.
         """
-        if hasattr(self, "btn_mh"):
-            self.btn_mh.clicked.connect(self._choisir_mh)
+        for nom, nom_slot in self.BOUTONS_FICHIERS:
+            bouton = self._widgets[nom]
+            if bouton is not None:
+                bouton.clicked.connect(getattr(self, nom_slot))
 
-        if hasattr(self, "btn_cir"):
-            self.btn_cir.clicked.connect(self._choisir_cir)
+    def widget(self, nom):
+        """
+        Retourne un widget optionnel de l'interface.
 
-        if hasattr(self, "btn_val"):
-            self.btn_val.clicked.connect(self._choisir_val_sortie)
+        Paramètres
+        ----------
+        nom : str
+            Nom du widget dans le .ui (voir NOMS_WIDGETS).
 
-        if hasattr(self, "btn_val_in"):
-            self.btn_val_in.clicked.connect(self._choisir_val_entree)
+        Retour
+        ------
+        QWidget ou None
+            Widget, ou None s'il est absent du .ui.
+        """
+        return self._widgets.get(nom)
 
-        if hasattr(self, "btn_med"):
-            self.btn_med.clicked.connect(self._choisir_med)
+    def _texte(self, nom):
+        """
+        Texte saisi dans un champ de l'interface.
+
+        Paramètres
+        ----------
+        nom : str
+            Nom du QLineEdit dans le .ui.
+
+        Retour
+        ------
+        str
+            Texte sans espaces de bord, ou chaîne vide si le widget n'existe pas.
+        """
+        champ = self._widgets[nom]
+        return champ.text().strip() if champ is not None else ""
+
+    def _remplir(self, nom, texte):
+        """
+        Écrit un texte dans un champ de l'interface s'il existe.
+
+        Paramètres
+        ----------
+        nom : str
+            Nom du QLineEdit dans le .ui.
+        texte : str
+            Texte à écrire.
+        """
+        champ = self._widgets[nom]
+        if champ is not None:
+            champ.setText(texte)
 
     def _journal(self, message, niveau=Qgis.Info):
         """
@@ -124,95 +227,155 @@ class MhSmDialog(QDialog, CLASSE_UI):
         self._journal(texte, Qgis.Critical)
         QMessageBox.critical(self, titre, texte)
 
+    def _boite_fichier(self, cle, titre, filtre, enregistrer):
+        """
+        Boîte de dialogue fichier associée à un type de fichier.
+
+        La boîte est construite au premier appel pour une clé donnée, ouverte
+        dans le dernier dossier mémorisé, puis conservée : les clics suivants
+        réutilisent la même instance (et son modèle de système de fichiers)
+        au lieu d'en reconstruire une à chaque fois.
+
+        Paramètres
+        ----------
+        cle : str
+            Identifiant du type de fichier (mh, cir, val_out, val_in, med).
+        titre : str
+            Titre de la boîte de dialogue.
+        filtre : str
+            Filtre de fichiers Qt.
+        enregistrer : bool
+            Si True, boîte d'enregistrement, sinon boîte d'ouverture.
+
+        Retour
+        ------
+        QFileDialog
+            Boîte de dialogue prête à être exécutée.
+        """
+        boite = self._boites_fichier.get(cle)
+        if boite is None:
+            depart = QSettings("mh_sm_plugin", "chemins").value("dernier_dossier/" + cle, "")
+            boite = QFileDialog(self, titre, depart)
+            boite.setOption(QFileDialog.DontUseCustomDirectoryIcons, True)
+            if enregistrer:
+                boite.setAcceptMode(QFileDialog.AcceptSave)
+            else:
+                boite.setAcceptMode(QFileDialog.AcceptOpen)
+                boite.setFileMode(QFileDialog.ExistingFile)
+            self._boites_fichier[cle] = boite
+
+        boite.setWindowTitle(titre)
+        boite.setNameFilter(filtre)
+        return boite
+
+    def _choisir_fichier(self, cle, titre, filtre, titre_erreur, enregistrer=False):
+        """
+        Ouvre une boîte de dialogue fichier dans le dernier dossier utilisé.
+
+        Le dernier dossier est mémorisé par type de fichier (cle) dans les
+        QSettings du plugin. Les icônes personnalisées des dossiers ne sont pas
+        chargées, ce qui évite un accès disque par fichier listé. La boîte
+        elle-même est réutilisée d'un clic à l'autre (voir _boite_fichier).
+
+        Paramètres
+        ----------
+        cle : str
+            Identifiant du type de fichier (mh, cir, val_out, val_in, med).
+        titre : str
+            Titre de la boîte de dialogue.
+        filtre : str
+            Filtre de fichiers Qt.
+        titre_erreur : str
+            Titre de la fenêtre affichée si la boîte de dialogue échoue.
+        enregistrer : bool
+            Si True, boîte d'enregistrement, sinon boîte d'ouverture.
+
+        Retour
+        ------
+        str
+            Chemin choisi, ou chaîne vide si annulé ou en cas d'erreur.
+        """
+        try:
+            boite = self._boite_fichier(cle, titre, filtre, enregistrer)
+            if not boite.exec_():
+                return ""
+            fichiers = boite.selectedFiles()
+        except Exception:
+            # traceback n'est importé que si une erreur survient
+            import traceback
+            self._afficher_erreur(titre_erreur, traceback.format_exc())
+            return ""
+
+        chemin = fichiers[0] if fichiers else ""
+        if chemin:
+            QSettings("mh_sm_plugin", "chemins").setValue(
+                "dernier_dossier/" + cle, os.path.dirname(chemin)
+            )
+        return chemin
+
     def _choisir_mh(self):
         """
         Ouvre une boîte de dialogue pour choisir le fichier MH d'entrée.
 
         Formats attendus : .txt ou .asc (ESRI ASCII grid).
         """
-        try:
-            chemin, _ = QFileDialog.getOpenFileName(
-                self,
-                "Choisir un raster MH",
-                "",
-                "MH (*.txt *.asc);;Tous les fichiers (*.*)"
-            )
-            if chemin and hasattr(self, "line_mh"):
-                self.line_mh.setText(chemin)
-        except Exception:
-            self._afficher_erreur("Erreur sélection MH", traceback.format_exc())
+        chemin = self._choisir_fichier(
+            "mh", "Choisir un raster MH",
+            "MH (*.txt *.asc);;Tous les fichiers (*.*)", "Erreur sélection MH"
+        )
+        if chemin:
+            self._remplir("line_mh", chemin)
 
     def _choisir_cir(self):
         """
         Ouvre une boîte de dialogue pour choisir le fichier scene_triangle.cir.
         """
-        try:
-            chemin, _ = QFileDialog.getOpenFileName(
-                self,
-                "Choisir scene_triangle.cir",
-                "",
-                "CIR (*.cir);;Tous les fichiers (*.*)"
-            )
-            if chemin and hasattr(self, "line_cir"):
-                self.line_cir.setText(chemin)
-        except Exception:
-            self._afficher_erreur("Erreur sélection CIR", traceback.format_exc())
+        chemin = self._choisir_fichier(
+            "cir", "Choisir scene_triangle.cir",
+            "CIR (*.cir);;Tous les fichiers (*.*)", "Erreur sélection CIR"
+        )
+        if chemin:
+            self._remplir("line_cir", chemin)
 
     def _choisir_val_sortie(self):
         """
         Ouvre une boîte de dialogue pour choisir le fichier .val de sortie
         de la conversion MH vers SM.
         """
-        try:
-            chemin, _ = QFileDialog.getSaveFileName(
-                self,
-                "Choisir le fichier val de sortie",
-                "",
-                "VAL (*.val)"
-            )
-            if not chemin:
-                return
+        chemin = self._choisir_fichier(
+            "val_out", "Choisir le fichier val de sortie",
+            "VAL (*.val)", "Erreur sélection sortie val", enregistrer=True
+        )
+        if not chemin:
+            return
 
-            if not chemin.lower().endswith(".val"):
-                chemin += ".val"
+        if os.path.splitext(chemin)[1].lower() != ".val":
+            chemin += ".val"
 
-            if hasattr(self, "line_val"):
-                self.line_val.setText(chemin)
-        except Exception:
-            self._afficher_erreur("Erreur sélection sortie val", traceback.format_exc())
+        self._remplir("line_val", chemin)
 
     def _choisir_val_entree(self):
         """
         Ouvre une boîte de dialogue pour choisir un fichier .val existant
         pour la conversion SM vers MH.
         """
-        try:
-            chemin, _ = QFileDialog.getOpenFileName(
-                self,
-                "Choisir un fichier val",
-                "",
-                "VAL (*.val);;Tous les fichiers (*.*)"
-            )
-            if chemin and hasattr(self, "line_val_in"):
-                self.line_val_in.setText(chemin)
-        except Exception:
-            self._afficher_erreur("Erreur sélection entrée val", traceback.format_exc())
+        chemin = self._choisir_fichier(
+            "val_in", "Choisir un fichier val",
+            "VAL (*.val);;Tous les fichiers (*.*)", "Erreur sélection entrée val"
+        )
+        if chemin:
+            self._remplir("line_val_in", chemin)
 
     def _choisir_med(self):
         """
         Ouvre une boîte de dialogue pour choisir un fichier MED (optionnel).
         """
-        try:
-            chemin, _ = QFileDialog.getOpenFileName(
-                self,
-                "Choisir un fichier MED",
-                "",
-                "MED (*.med);;Tous les fichiers (*.*)"
-            )
-            if chemin and hasattr(self, "line_med"):
-                self.line_med.setText(chemin)
-        except Exception:
-            self._afficher_erreur("Erreur sélection MED", traceback.format_exc())
+        chemin = self._choisir_fichier(
+            "med", "Choisir un fichier MED",
+            "MED (*.med);;Tous les fichiers (*.*)", "Erreur sélection MED"
+        )
+        if chemin:
+            self._remplir("line_med", chemin)
 
     def chemin_mh(self):
         """
@@ -223,7 +386,7 @@ class MhSmDialog(QDialog, CLASSE_UI):
         str
             Chemin ou chaîne vide si le widget n'existe pas.
         """
-        return self.line_mh.text().strip() if hasattr(self, "line_mh") else ""
+        return self._texte("line_mh")
 
     def chemin_cir(self):
         """
@@ -234,7 +397,7 @@ class MhSmDialog(QDialog, CLASSE_UI):
         str
             Chemin ou chaîne vide si le widget n'existe pas.
         """
-        return self.line_cir.text().strip() if hasattr(self, "line_cir") else ""
+        return self._texte("line_cir")
 
     def chemin_val_sortie(self):
         """
@@ -245,7 +408,7 @@ class MhSmDialog(QDialog, CLASSE_UI):
         str
             Chemin ou chaîne vide si le widget n'existe pas.
         """
-        return self.line_val.text().strip() if hasattr(self, "line_val") else ""
+        return self._texte("line_val")
 
     def chemin_val_entree(self):
         """
@@ -256,7 +419,7 @@ class MhSmDialog(QDialog, CLASSE_UI):
         str
             Chemin ou chaîne vide si le widget n'existe pas.
         """
-        return self.line_val_in.text().strip() if hasattr(self, "line_val_in") else ""
+        return self._texte("line_val_in")
 
     def chemin_med(self):
         """
@@ -267,5 +430,16 @@ class MhSmDialog(QDialog, CLASSE_UI):
         str
             Chemin ou chaîne vide si le widget n'existe pas.
         """
-        return self.line_med.text().strip() if hasattr(self, "line_med") else ""
+        return self._texte("line_med")
 
+    def comparaison_sur_disque(self):
+        """
+        Indique si les GeoTIFF de comparaison doivent être écrits sur disque.
+
+        Retour
+        ------
+        bool
+            État de la case à cocher, True si le widget n'existe pas.
+        """
+        case = self._widgets["chk_comparaison_disque"]
+        return bool(case.isChecked()) if case is not None else True
@@ -15,13 +15,38 @@ Important :
 - L'alignement ici est volontairement simple ce qui a crée probablement un décalage d'emprise entre les deux rasters (pas de recalage fin).
 - Les fonctions ne modifient jamais le tableau d'entrée, elles renvoient
   toujours une copie.
+- Un maillage en float32 reste en float32, tout autre type passe en float64.
 """
 
 from __future__ import annotations
 
+from functools import lru_cache
+
 import numpy as np
 
 
+def _type_flottant(pts):
+    """
+    Type flottant de travail pour un tableau de points.
+
+    Un maillage déjà en float32 reste en float32 (précision suffisante pour
+    un alignement rigide, moitié moins d'octets), tout le reste passe en float64.
+
+    Paramètres
+    ----------
+    pts : np.ndarray
+        Tableau des points.
+
+    Retour
+    ------
+    np.dtype
+        float32 ou float64.
+    """
+    if pts.dtype == np.float32:
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+
 def bbox_raster(geo_transforme, forme_raster):
     """
     Calcule la boite englobante d'un raster en coordonnées monde.
@@ -49,16 +74,14 @@ def bbox_raster(geo_transforme, forme_raster):
     """
     nb_lignes, nb_colonnes = forme_raster
 
-    x_min = float(geo_transforme[0])
-    pas_x = float(geo_transforme[1])
-    y_max = float(geo_transforme[3])
-    pas_y = float(geo_transforme[5])
+    # Une seule passe de conversion sur les 6 termes du geotransform
+    x_min, pas_x, _, y_max, _, pas_y = map(float, geo_transforme)
 
     x_max = x_min + pas_x * nb_colonnes
     y_min = y_max + pas_y * nb_lignes
 
     # On renvoie bien (xmin, xmax, ymin, ymax)
-    return float(x_min), float(x_max), float(y_min), float(y_max)
+    return x_min, x_max, y_min, y_max
 
 
 def bbox_maillage(pts):
@@ -79,8 +102,11 @@ def bbox_maillage(pts):
     if pts.ndim != 2 or pts.shape[1] < 2:
         raise ValueError("pts doit être un tableau de forme (N,2) ou (N,3)")
 
-    x = pts[:, 0].astype(float)
-    y = pts[:, 1].astype(float)
+    # Quatre réductions 1D sur les colonnes, sans copie. Une réduction
+    # min(axis=0) sur un tableau (N, 2) est bien plus lente : numpy y itère
+    # sur un axe interne de longueur 2 au lieu d'une boucle vectorisée.
+    x = pts[:, 0]
+    y = pts[:, 1]
 
     return float(x.min()), float(x.max()), float(y.min()), float(y.max())
 
@@ -111,6 +137,58 @@ def translation_maillage(pts, geo_transforme, forme_raster):
     C'est utile quand le maillage et le raster sont dans le même repère
     mais avec un léger décalage de position.
     """
+    pts = np.asarray(pts)
+    tx, ty = _translation_centres(pts, geo_transforme, forme_raster)
+
+    # Une seule addition sur la vue XY, écrite directement dans la sortie
+    pts2 = _copie_hors_xy(pts, _type_flottant(pts))
+    np.add(pts[:, :2], (tx, ty), out=pts2[:, :2])
+
+    return pts2, (float(tx), float(ty))
+
+
+def _copie_hors_xy(pts, type_pts):
+    """
+    Alloue le tableau de sortie et n'y recopie que les colonnes au-delà de XY.
+
+    Les colonnes X et Y sont écrites une seule fois par l'appelant, directement
+    avec leur valeur finale (pas de copie suivie d'une mise à jour en place).
+
+    Paramètres
+    ----------
+    pts : np.ndarray
+        Tableau (N,2) ou (N,3) des points.
+    type_pts : np.dtype
+        Type flottant de la sortie.
+
+    Retour
+    ------
+    np.ndarray
+        Tableau de même forme, colonnes XY non initialisées.
+    """
+    pts2 = np.empty(pts.shape, dtype=type_pts)
+    pts2[:, 2:] = pts[:, 2:]
+    return pts2
+
+
+def _translation_centres(pts, geo_transforme, forme_raster):
+    """
+    Translation XY qui amène le centre bbox du maillage sur le centre bbox du raster.
+
+    Paramètres
+    ----------
+    pts : np.ndarray
+        Tableau (N,3) (ou (N,2)) des points du maillage.
+    geo_transforme : tuple
+        Geotransform GDAL du raster.
+    forme_raster : tuple[int, int]
+        Forme (nb_lignes, nb_colonnes) du raster.
+
+    Retour
+    ------
+    tuple[float, float]
+        (tx, ty)
+    """
     x_min_r, x_max_r, y_min_r, y_max_r = bbox_raster(geo_transforme, forme_raster)
     x_min_m, x_max_m, y_min_m, y_max_m = bbox_maillage(pts)
 
@@ -122,14 +200,69 @@ def translation_maillage(pts, geo_transforme, forme_raster):
     cx_m = 0.5 * (x_min_m + x_max_m)
     cy_m = 0.5 * (y_min_m + y_max_m)
 
-    tx = cx_r - cx_m
-    ty = cy_r - cy_m
+    return cx_r - cx_m, cy_r - cy_m
 
-    pts2 = np.array(pts, dtype=float, copy=True)
-    pts2[:, 0] += tx
-    pts2[:, 1] += ty
 
-    return pts2, (float(tx), float(ty))
+@lru_cache(maxsize=64)
+def _cos_sin(angle_deg):
+    """
+    Cosinus et sinus d'un angle, mémorisés par angle.
+
+    Les multiples de 90° renvoient des valeurs exactes (0, 1, -1) : pas de
+    résidu du type cos(pi/2) = 6e-17 dans les coordonnées tournées.
+
+    Paramètres
+    ----------
+    angle_deg : float
+        Angle en degrés, sens trigonométrique.
+
+    Retour
+    ------
+    tuple[float, float]
+        (cos, sin)
+    """
+    quart, reste = divmod(float(angle_deg), 90.0)
+    if reste == 0.0:
+        return ((1.0, 0.0), (0.0, 1.0), (-1.0, 0.0), (0.0, -1.0))[int(quart) % 4]
+
+    theta = np.deg2rad(float(angle_deg))
+    return float(np.cos(theta)), float(np.sin(theta))
+
+
+def _tourner_xy(xy, angle_deg):
+    """
+    Rotation de coordonnées XY déjà recentrées.
+
+    Les quarts de tour sont de simples permutations de colonnes et changements
+    de signe, sans produit matriciel.
+
+    Paramètres
+    ----------
+    xy : np.ndarray
+        Tampon (N, 2) contigu, propriété de l'appelant (il peut être modifié).
+    angle_deg : float
+        Angle en degrés, sens trigonométrique.
+
+    Retour
+    ------
+    np.ndarray
+        Tableau (N, 2) des coordonnées tournées.
+    """
+    cos_t, sin_t = _cos_sin(angle_deg)
+
+    if sin_t == 0.0:
+        # 0° ou 180°
+        return xy if cos_t > 0.0 else np.negative(xy, out=xy)
+
+    if cos_t == 0.0:
+        # 90° : (x, y) -> (-y, x), 270° : (x, y) -> (y, -x)
+        res = xy[:, ::-1].copy()
+        res[:, 0 if sin_t > 0.0 else 1] *= -1
+        return res
+
+    rot = np.array([[cos_t, -sin_t],
+                    [sin_t,  cos_t]], dtype=xy.dtype)
+    return xy @ rot.T
 
 
 def rotation_xy(pts, angle_deg, centre_xy=None):
@@ -156,28 +289,27 @@ def rotation_xy(pts, angle_deg, centre_xy=None):
     if pts.ndim != 2 or pts.shape[1] < 2:
         raise ValueError("pts doit être un tableau de forme (N,2) ou (N,3)")
 
-    theta = float(np.deg2rad(angle_deg))
+    type_pts = _type_flottant(pts)
+
+    # Rotation nulle (ou tour complet) : identité, seule la copie est nécessaire
+    if _cos_sin(angle_deg) == (1.0, 0.0):
+        return np.array(pts, dtype=type_pts, copy=True)
 
     if centre_xy is None:
-        centre_xy = pts[:, :2].astype(float).mean(axis=0)
+        centre_xy = pts[:, :2].mean(axis=0, dtype=np.float64)
 
     cx = float(centre_xy[0])
     cy = float(centre_xy[1])
 
-    cos_t = float(np.cos(theta))
-    sin_t = float(np.sin(theta))
-
-    # Matrice de rotation 2D
-    rot = np.array([[cos_t, -sin_t],
-                    [sin_t,  cos_t]], dtype=float)
+    pts2 = _copie_hors_xy(pts, type_pts)
+    centre = np.array([cx, cy], dtype=type_pts)
 
-    pts2 = np.array(pts, dtype=float, copy=True)
-
-    # On recentre sur le centre choisi, on tourne, puis on remet dans le repère initial
-    xy = pts2[:, :2] - np.array([cx, cy], dtype=float)
-    xy_rot = xy @ rot.T
-    pts2[:, 0] = xy_rot[:, 0] + cx
-    pts2[:, 1] = xy_rot[:, 1] + cy
+    # On recentre sur le centre choisi, on tourne, puis on remet dans le repère initial.
+    # Pour un tableau (N, 3), pts[:, :2] est une vue à pas non contigu : on le
+    # lit une fois vers un tampon contigu (entrée directe pour BLAS), et on
+    # écrit une seule fois les XY de la sortie, recentrage compris.
+    xy = np.subtract(pts[:, :2], centre, dtype=type_pts)
+    np.add(_tourner_xy(xy, angle_deg), centre, out=pts2[:, :2])
 
     return pts2
 
@@ -218,11 +350,30 @@ def alignement_rigide(pts, geo_transforme, forme_raster, angle_deg=0.0):
     if pts.ndim != 2 or pts.shape[1] < 2:
         raise ValueError("pts doit être un tableau de forme (N,2) ou (N,3)")
 
+    if float(angle_deg) == 0.0:
+        # Pas de rotation : translation_maillage fait la seule copie
+        pts_ok, (tx, ty) = translation_maillage(pts, geo_transforme, forme_raster)
+        return pts_ok, (float(angle_deg), float(tx), float(ty))
+
+    type_pts = _type_flottant(pts)
+
     # Centre du maillage pour la rotation
-    centre = pts[:, :2].astype(float).mean(axis=0)
+    centre = pts[:, :2].mean(axis=0, dtype=np.float64).astype(type_pts)
+
+    # Rotation et translation fusionnées : les XY tournés (relatifs au centre)
+    # restent dans un tampon contigu, la bbox y est lue, puis une seule écriture
+    # dans la copie applique à la fois le retour au centre et la translation.
+    pts_ok = _copie_hors_xy(pts, type_pts)
+    xy = _tourner_xy(np.subtract(pts[:, :2], centre, dtype=type_pts), angle_deg)
+
+    x_min_r, x_max_r, y_min_r, y_max_r = bbox_raster(geo_transforme, forme_raster)
+    x = xy[:, 0]
+    y = xy[:, 1]
+
+    tx = 0.5 * (x_min_r + x_max_r) - (float(centre[0]) + 0.5 * float(x.min() + x.max()))
+    ty = 0.5 * (y_min_r + y_max_r) - (float(centre[1]) + 0.5 * float(y.min() + y.max()))
 
-    pts_rot = rotation_xy(pts, angle_deg, centre_xy=(float(centre[0]), float(centre[1])))
-    pts_ok, (tx, ty) = translation_maillage(pts_rot, geo_transforme, forme_raster)
+    np.add(xy, centre + np.array([tx, ty], dtype=type_pts), out=pts_ok[:, :2])
 
     return pts_ok, (float(angle_deg), float(tx), float(ty))
 
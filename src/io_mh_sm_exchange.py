@@ -24,42 +24,39 @@ Méthodes de projection
   on associe des triangles aux pixels (intersection géométrique) puis on calcule
   une moyenne de triangles pour obtenir une valeur par pixel.
 
-La correspondance géométrique pixel triangle est obtenue via mapping_surface
+La correspondance géométrique pixel triangle est obtenue via mapping_surface_plat
 dans le module mapping.
 """
 
+import os
 import re
 from collections import defaultdict
+from functools import lru_cache
+from io import BytesIO
+from itertools import chain
 
 import numpy as np
 
-from .mapping import mapping_surface
+from .mapping import aplatir_mapping_surface, mapping_par_triangle, mapping_surface_plat
 
 
 NODATA_MH = -9999.0
 
+# Nombre de lignes de raster converties et écrites à la fois par ecrire_mh_ascii
+LIGNES_BLOC_ASCII = 256
 
-def _valeurs_ascii(lignes_donnees):
-    """
-    Transforme une liste de lignes ASCII contenant des nombres en liste de float.
+# Clés de l'en-tête d'un fichier ESRI ASCII grid
+_CLES_ENTETE_ASCII = ("ncols", "nrows", "xllcorner", "yllcorner", "cellsize", "nodata_value")
 
-    Paramètres
-    ----------
-    lignes_donnees : list[str]
-        Lignes de valeurs issues d'un fichier ASCII grid.
+# Lignes d'en-tête de facette ("fX N") et de normale ("nx ny nz") d'un fichier .cir
+_RE_FACETTE_CIR = re.compile(r"f\d+\s+(\d+)")
+_RE_NORMALE_CIR = re.compile(r"-?\d+(\.\d+)?\s+-?\d+(\.\d+)?\s+-?\d+(\.\d+)?$")
 
-    Retour
-    ------
-    list[float]
-        Valeurs converties en float, dans l'ordre de lecture.
-    """
-    vals = []
-    for lig in lignes_donnees:
-        vals.extend([float(x) for x in lig.split()])
-    return vals
+# Ligne d'en-tête de facette d'un fichier .val : "fX N"
+_RE_FACETTE_VAL = re.compile(rb"^[ \t]*f\S*[ \t]+(\d+)[^\n]*$", re.M)
 
 
-def lire_mh_ascii(chemin):
+def lire_mh_ascii(chemin, dtype=np.float64):
     """
     Lit un raster MH au format ESRI ASCII grid (.txt ou .asc).
 
@@ -67,11 +64,15 @@ def lire_mh_ascii(chemin):
     ----------
     chemin : str
         Chemin du fichier raster à lire.
+    dtype : np.dtype
+        Type flottant du raster renvoyé. float64 par défaut (calculs des
+        conversions). float32 divise la mémoire par deux quand le raster ne
+        sert qu'à l'affichage ou à la comparaison.
 
     Retour
     ------
     tuple[np.ndarray, tuple, float]
-        ras : np.ndarray float, forme (nb_lignes, nb_colonnes)
+        ras : np.ndarray de type dtype, forme (nb_lignes, nb_colonnes)
             Tableau du raster. Les pixels NODATA sont remplacés par NaN.
         gt : tuple[float, float, float, float, float, float]
             Geotransform compatible GDAL :
@@ -89,28 +90,42 @@ def lire_mh_ascii(chemin):
     Même si le fichier contient un autre code NODATA, il sera converti en NaN.
     La convention interne du projet reste NODATA_MH = -9999.
     """
-    entete = {}
-    lignes_donnees = []
+    with open(chemin, "rb") as f:
+        # En-tête : lignes "cle valeur" en début de fichier. On lit ligne à
+        # ligne et on revient au début de la première ligne de données.
+        entete = {}
+        while len(entete) < 6:
+            debut_ligne = f.tell()
+            ligne = f.readline()
+            if not ligne:
+                break
 
-    with open(chemin, "r", errors="ignore") as f:
-        for lig in f:
-            s = lig.strip()
-            if not s:
+            mots = ligne.split()
+            if not mots:
                 continue
 
-            bas = s.lower()
-            if len(entete) < 6 and (
-                bas.startswith("ncols") or bas.startswith("nrows") or
-                bas.startswith("xllcorner") or bas.startswith("yllcorner") or
-                bas.startswith("cellsize") or bas.startswith("nodata_value")
-            ):
-                k, v = s.split()[:2]
-                entete[k.lower()] = float(v)
-            else:
-                lignes_donnees.append(s)
+            cle = mots[0].decode("ascii", errors="ignore").lower()
+            if cle not in _CLES_ENTETE_ASCII:
+                f.seek(debut_ligne)
+                break
+            entete[cle] = float(mots[1])
+
+        # Position de la première valeur, que l'en-tête compte 5 ou 6 clés
+        debut_donnees = f.tell()
+
+        nb_colonnes = int(entete["ncols"])
+        nb_lignes = int(entete["nrows"])
+
+        # Données : le reste du fichier est lu directement par le parseur C de
+        # numpy, sans passer par une chaîne python. Si le fichier ne respecte
+        # pas une ligne par rangée du raster (retours à la ligne libres), on
+        # relit les valeurs comme un simple flux de nombres.
+        try:
+            vals = np.loadtxt(f, dtype=dtype, ndmin=1)
+        except ValueError:
+            f.seek(debut_donnees)
+            vals = np.fromstring(f.read(), dtype=dtype, sep=" ")
 
-    nb_colonnes = int(entete["ncols"])
-    nb_lignes = int(entete["nrows"])
     xll = float(entete["xllcorner"])
     yll = float(entete["yllcorner"])
     pas = float(entete["cellsize"])
@@ -121,15 +136,112 @@ def lire_mh_ascii(chemin):
     y_max = yll + nb_lignes * pas
     gt = (xll, pas, 0.0, y_max, 0.0, -pas)
 
-    vals = _valeurs_ascii(lignes_donnees)
-    ras = np.array(vals, dtype=float).reshape((nb_lignes, nb_colonnes))
+    if vals.size != nb_lignes * nb_colonnes:
+        raise ValueError("Nombre de valeurs incohérent avec ncols x nrows " + str(chemin))
+    ras = vals.reshape((nb_lignes, nb_colonnes))
 
-    ras[ras == nodata_fichier] = np.nan
-    ras[ras == nodata] = np.nan
+    # Un seul masque (une seule comparaison si le fichier utilise déjà -9999),
+    # appliqué en place
+    masque = ras == nodata
+    if nodata_fichier != nodata:
+        masque |= ras == nodata_fichier
+    np.putmask(ras, masque, np.nan)
 
     return ras, gt, nodata
 
 
+def _coords_cir(lignes_pts):
+    """Convertit les lignes "x y z ..." retenues en tableau float (N, 3)."""
+    if not lignes_pts:
+        return np.zeros((0, 3), dtype=float)
+    return np.loadtxt(lignes_pts, dtype=float, usecols=(0, 1, 2),
+                      comments=None, ndmin=2)
+
+
+def _lignes_points_cir(lignes, verifier):
+    """
+    Parcourt les lignes d'un .cir et retient les lignes des sommets.
+
+    Paramètres
+    ----------
+    lignes : list[str]
+        Lignes du fichier.
+    verifier : bool
+        Si False, les trois lignes qui suivent le nombre de points de chaque
+        bloc sont retenues telles quelles. Si True, seules les lignes d'au
+        moins trois valeurs sont retenues (les trois premières du bloc).
+
+    Retour
+    ------
+    tuple[list[int], list[str]]
+        Tailles des facettes et lignes des sommets, trois par triangle.
+    """
+    tailles_facettes = []
+    lignes_pts = []
+
+    dans_facette = False
+    nb_attendu = None
+    nb_lu = 0
+
+    nb_lignes = len(lignes)
+    i = 0
+    while i < nb_lignes:
+        s = lignes[i].strip()
+        i += 1
+
+        if not s:
+            continue
+
+        # Le motif n'est testé que sur les lignes qui peuvent être un en-tête
+        m = _RE_FACETTE_CIR.match(s) if s[0] == "f" else None
+        if m:
+            nb_attendu = int(m.group(1))
+            tailles_facettes.append(nb_attendu)
+            dans_facette = True
+            nb_lu = 0
+
+            if i < nb_lignes and _RE_NORMALE_CIR.match(lignes[i].strip()):
+                i += 1
+            continue
+
+        if dans_facette and s[0] == "c":
+            if i >= nb_lignes:
+                break
+
+            try:
+                nb_pts = int(lignes[i])
+            except ValueError:
+                continue
+            i += 1
+
+            # Seuls les trois premiers points valides forment le triangle, les
+            # lignes suivantes du bloc sont sautées sans être découpées
+            fin_bloc = min(i + max(nb_pts, 0), nb_lignes)
+            if not verifier:
+                nb_coords = min(fin_bloc - i, 3)
+                if nb_coords == 3:
+                    lignes_pts += lignes[i:i + 3]
+            else:
+                nb_coords = 0
+                while i < fin_bloc and nb_coords < 3:
+                    if len(lignes[i].split()) >= 3:
+                        lignes_pts.append(lignes[i])
+                        nb_coords += 1
+                    i += 1
+                if nb_coords != 3:
+                    del lignes_pts[len(lignes_pts) - nb_coords:]
+            i = fin_bloc
+
+            if nb_coords == 3:
+                nb_lu += 1
+
+            if nb_attendu is not None and nb_lu >= nb_attendu:
+                dans_facette = False
+                nb_attendu = None
+
+    return tailles_facettes, lignes_pts
+
+
 def lire_scene_triangle_cir(chemin):
     """
     Lit un fichier scene_triangle.cir et reconstruit l'ordre des triangles.
@@ -162,73 +274,145 @@ def lire_scene_triangle_cir(chemin):
     --------
     L'ordre de lecture correspond à l'ordre officiel à respecter pour les fichiers .val.
     """
-    tailles_facettes = []
-    pts = []
-    tri = []
+    with open(chemin, "r", errors="ignore") as f:
+        lignes = f.read().split("\n")
 
-    dans_facette = False
-    nb_attendu = None
-    nb_lu = 0
+    # Passe rapide : les trois lignes qui suivent le nombre de points d'un bloc
+    # sont retenues sans découpage et converties en une seule passe C. Si une
+    # ligne est incomplète, la passe vérifiée ligne à ligne prend le relais.
+    tailles_facettes, lignes_pts = _lignes_points_cir(lignes, verifier=False)
+    try:
+        pts = _coords_cir(lignes_pts)
+    except ValueError:
+        pts = None
+    if pts is None or len(pts) != len(lignes_pts):
+        tailles_facettes, lignes_pts = _lignes_points_cir(lignes, verifier=True)
+        pts = _coords_cir(lignes_pts)
 
-    with open(chemin, "r", errors="ignore") as f:
-        lignes = f.readlines()
+    tri = np.arange(len(pts), dtype=int).reshape(-1, 3)
 
-    i = 0
-    while i < len(lignes):
-        s = lignes[i].strip()
-        i += 1
+    return tailles_facettes, pts, tri
 
-        if not s:
-            continue
 
-        m = re.match(r"^f(\d+)\s+(\d+)", s)
-        if m:
-            nb_attendu = int(m.group(2))
-            tailles_facettes.append(nb_attendu)
-            dans_facette = True
-            nb_lu = 0
+def cle_fichier(chemin):
+    """
+    Construit une clé d'identification d'un fichier pour les caches.
 
-            if i < len(lignes):
-                peek = lignes[i].strip()
-                if re.match(r"^-?\d+(\.\d+)?\s+-?\d+(\.\d+)?\s+-?\d+(\.\d+)?$", peek):
-                    i += 1
-            continue
+    Paramètres
+    ----------
+    chemin : str
+        Chemin du fichier.
 
-        if dans_facette and s.startswith("c"):
-            if i >= len(lignes):
-                break
+    Retour
+    ------
+    tuple[str, float, int]
+        (chemin absolu, date de modification, taille). La clé change dès que
+        le fichier est modifié sur disque.
+    """
+    st = os.stat(chemin)
+    return os.path.abspath(chemin), st.st_mtime, st.st_size
 
-            try:
-                nb_pts = int(lignes[i].strip())
-            except ValueError:
-                continue
-            i += 1
 
-            coords = []
-            for _ in range(nb_pts):
-                if i >= len(lignes):
-                    break
-                xyz = lignes[i].strip().split()
-                i += 1
-                if len(xyz) >= 3:
-                    coords.append([float(xyz[0]), float(xyz[1]), float(xyz[2])])
-
-            if len(coords) >= 3:
-                i0 = len(pts)
-                pts.append(coords[0])
-                i1 = len(pts)
-                pts.append(coords[1])
-                i2 = len(pts)
-                pts.append(coords[2])
-
-                tri.append([i0, i1, i2])
-                nb_lu += 1
+@lru_cache(maxsize=8)
+def _cir_cache(cle_cir):
+    """
+    Lit (ou récupère) un fichier scene_triangle.cir.
 
-            if nb_attendu is not None and nb_lu >= nb_attendu:
-                dans_facette = False
-                nb_attendu = None
+    Paramètres
+    ----------
+    cle_cir : tuple
+        Clé du fichier, voir cle_fichier.
+
+    Retour
+    ------
+    tuple[tuple[int, ...], np.ndarray, np.ndarray]
+        tailles_facettes, pts, tri (comme lire_scene_triangle_cir).
+        Les tailles sont un tuple et les tableaux sont en lecture seule car partagés.
+    """
+    tailles, pts, tri = lire_scene_triangle_cir(cle_cir[0])
+    pts.setflags(write=False)
+    tri.setflags(write=False)
+    return tuple(tailles), pts, tri
+
+
+def lire_scene_triangle_cir_cache(chemin):
+    """
+    Lit un fichier scene_triangle.cir en passant par le cache du module.
+
+    Un même maillage est souvent réutilisé pour plusieurs rasters : il n'est
+    relu que si le fichier change sur disque.
+
+    Paramètres
+    ----------
+    chemin : str
+        Chemin du fichier scene_triangle.cir.
+
+    Retour
+    ------
+    tuple[tuple[int, ...], np.ndarray, np.ndarray]
+        tailles_facettes, pts (lecture seule), tri (lecture seule).
+    """
+    return _cir_cache(cle_fichier(chemin))
+
+
+@lru_cache(maxsize=4)
+def _mapping_cache(cle_cir, forme_ras, gt):
+    """
+    Calcule (ou récupère) le mapping pixel triangle d'un .cir sur une grille.
+
+    Le mapping surface-based est l'étape la plus coûteuse des conversions.
+    Il ne dépend que de la grille du raster et du .cir : il est donc gardé en
+    mémoire tant que ces deux entrées ne changent pas.
+
+    Paramètres
+    ----------
+    cle_cir : tuple
+        Clé du fichier scene_triangle.cir, voir cle_fichier.
+    forme_ras : tuple[int, int]
+        Forme du raster (nb_lignes, nb_colonnes).
+    gt : tuple
+        Geotransform du raster.
+
+    Retour
+    ------
+    tuple
+        ((lignes, colonnes, ids_tri, aires), (tx, ty)).
+        Les tableaux sont en lecture seule car partagés.
+    """
+    _, pts, tri = _cir_cache(cle_cir)
+
+    pts2, translation = aligner_par_bbox(pts, gt, forme_ras)
+    mapping = mapping_surface_plat(pts2, tri, gt, forme_ras)
+
+    for tab in mapping:
+        tab.setflags(write=False)
+
+    return mapping, translation
+
+
+def mapping_cir_cache(chemin_cir, forme_ras, gt):
+    """
+    Mapping pixel triangle d'un .cir aligné sur une grille, via le cache du module.
+
+    Paramètres
+    ----------
+    chemin_cir : str
+        Chemin du fichier scene_triangle.cir.
+    forme_ras : tuple[int, int]
+        Forme du raster (nb_lignes, nb_colonnes).
+    gt : tuple
+        Geotransform du raster.
 
-    return np.asarray(tailles_facettes, dtype=int).tolist(), np.asarray(pts, dtype=float), np.asarray(tri, dtype=int)
+    Retour
+    ------
+    tuple
+        ((lignes, colonnes, ids_tri, aires), (tx, ty)) : mapping à plat en
+        lecture seule (voir mapping_surface_plat) et translation appliquée
+        par aligner_par_bbox.
+    """
+    forme_ras = tuple(int(n) for n in forme_ras)
+    gt = tuple(float(v) for v in gt)
+    return _mapping_cache(cle_fichier(chemin_cir), forme_ras, gt)
 
 
 def _bbox_xy(pts):
@@ -245,8 +429,9 @@ def _bbox_xy(pts):
     tuple[float, float, float, float]
         (x_min, y_min, x_max, y_max)
     """
-    x = pts[:, 0].astype(float)
-    y = pts[:, 1].astype(float)
+    pts = np.asarray(pts)
+    x = pts[:, 0]
+    y = pts[:, 1]
     return float(x.min()), float(y.min()), float(x.max()), float(y.max())
 
 
@@ -291,9 +476,11 @@ def aligner_par_bbox(pts, gt, forme_ras):
     tx = cx_r - cx_m
     ty = cy_r - cy_m
 
-    pts2 = np.array(pts, dtype=float, copy=True)
-    pts2[:, 0] += tx
-    pts2[:, 1] += ty
+    # Copie et translation en une seule addition diffusée (Z décalé de 0)
+    pts = np.asarray(pts)
+    decalage = np.zeros(pts.shape[1], dtype=float)
+    decalage[:2] = (tx, ty)
+    pts2 = np.add(pts, decalage, dtype=float)
 
     return pts2, (float(tx), float(ty))
 
@@ -322,14 +509,22 @@ def inverser_mapping(map_px, nb_triangles):
     --------
     Ce dictionnaire correspond à la notion "Triangles_pixels" discutée en réunion.
     """
+    nb_triangles = int(nb_triangles)
     tri_px = defaultdict(list)
 
-    for (lig, col), lst in map_px.items():
-        for id_tri, aire in lst:
-            tri_px[int(id_tri)].append((int(lig), int(col), float(aire)))
+    # Regroupement par triangle en tableaux contigus (tri stable : l'ordre de
+    # parcours des pixels du dictionnaire d'entrée est conservé), puis une
+    # seule conversion en tuples python pour le dictionnaire de sortie
+    debuts, lignes, colonnes, aires = mapping_par_triangle(
+        *aplatir_mapping_surface(map_px), nb_triangles
+    )
+    entrees = list(zip(lignes.tolist(), colonnes.tolist(), aires.tolist()))
 
-    for id_tri in range(int(nb_triangles)):
-        tri_px[id_tri] = tri_px.get(id_tri, [])
+    debuts = debuts.tolist()
+    for id_tri in range(len(debuts) - 1):
+        debut, fin = debuts[id_tri], debuts[id_tri + 1]
+        if fin > debut or id_tri < nb_triangles:
+            tri_px[id_tri] = entrees[debut:fin]
 
     return tri_px
 
@@ -356,33 +551,69 @@ def moyenne_pixels_par_triangle(ras, tri_px, pondere=False, rempl=np.nan):
         Tableau (nb_triangles,) des valeurs par triangle.
     """
     nb_tri = len(tri_px)
-    val_tri = np.full((nb_tri,), float(rempl), dtype=float)
 
-    for id_tri, pixels in tri_px.items():
-        if not pixels:
-            continue
+    # Mise à plat du dictionnaire, puis même agrégation np.bincount que pour
+    # le mapping à plat
+    ids = np.fromiter(tri_px.keys(), dtype=np.int64, count=nb_tri)
+    nb_par_tri = np.fromiter(map(len, tri_px.values()), dtype=np.int64, count=nb_tri)
+    entrees = np.fromiter(chain.from_iterable(chain.from_iterable(tri_px.values())), dtype=float,
+                          count=3 * int(nb_par_tri.sum())).reshape(-1, 3)
+
+    return moyenne_pixels_par_triangle_plat(
+        ras,
+        entrees[:, 0].astype(np.int64),
+        entrees[:, 1].astype(np.int64),
+        np.repeat(ids, nb_par_tri),
+        entrees[:, 2],
+        nb_tri,
+        pondere=pondere,
+        rempl=rempl,
+    )
 
-        vals = []
-        poids = []
 
-        for lig, col, aire in pixels:
-            v = ras[lig, col]
-            if not np.isfinite(v):
-                continue
-            vals.append(float(v))
-            poids.append(float(aire))
+def moyenne_pixels_par_triangle_plat(ras, lignes, colonnes, ids_tri, aires, nb_triangles,
+                                     pondere=False, rempl=np.nan):
+    """
+    Calcule une valeur par triangle à partir du mapping pixel triangle à plat.
 
-        if not vals:
-            continue
+    Même résultat que moyenne_pixels_par_triangle, mais l'agrégation est faite
+    en une passe avec np.bincount sur les indices de triangles.
 
-        if pondere:
-            w = np.asarray(poids, dtype=float)
-            if float(np.sum(w)) > 0.0:
-                val_tri[int(id_tri)] = float(np.sum(np.asarray(vals, dtype=float) * w) / np.sum(w))
-        else:
-            val_tri[int(id_tri)] = float(np.mean(np.asarray(vals, dtype=float)))
+    Paramètres
+    ----------
+    ras : np.ndarray
+        Raster MH (NaN sur les zones nodata).
+    lignes, colonnes, ids_tri, aires : np.ndarray
+        Mapping pixel triangle à plat, renvoyé par mapping_surface_plat.
+    nb_triangles : int
+        Nombre total de triangles.
+    pondere : bool
+        Si True, la moyenne est pondérée par l'aire d'intersection pixel triangle.
+        Si False, moyenne simple.
+    rempl : float
+        Valeur utilisée si un triangle ne reçoit aucune valeur.
 
-    return val_tri
+    Retour
+    ------
+    np.ndarray
+        Tableau (nb_triangles,) des valeurs par triangle.
+    """
+    nb_triangles = int(nb_triangles)
+
+    v = ras[lignes, colonnes]
+    garde = np.isfinite(v)
+    ids = ids_tri[garde]
+    v = v[garde]
+
+    if pondere:
+        a = aires[garde]
+        num = np.bincount(ids, weights=v * a, minlength=nb_triangles)
+        den = np.bincount(ids, weights=a, minlength=nb_triangles)
+    else:
+        num = np.bincount(ids, weights=v, minlength=nb_triangles)
+        den = np.bincount(ids, minlength=nb_triangles)
+
+    return np.divide(num, den, out=np.full(nb_triangles, float(rempl), dtype=float), where=den > 0)
 
 
 def ecrire_val(chemin_sortie, tailles_facettes, val_tri):
@@ -414,18 +645,23 @@ def ecrire_val(chemin_sortie, tailles_facettes, val_tri):
     vmin = float(np.min(fini)) if fini.size else 0.0
     vmax = float(np.max(fini)) if fini.size else 0.0
 
+    # NaN et inf remplacés d'un coup, puis chaque facette est formatée en une
+    # seule opération "%" (une chaîne de format répétée nb_tri fois)
+    vals = np.nan_to_num(np.asarray(val_tri, dtype=float), nan=0.0, posinf=0.0, neginf=0.0).tolist()
+
+    morceaux = [f"{nb_facettes} {nb_facettes}\t {vmin:.2f} {vmax:.2f}\n"]
+    k = 0
+    for i, nb_tri in enumerate(tailles_facettes, start=1):
+        nb_tri = int(nb_tri)
+        if k + nb_tri > len(vals):
+            raise IndexError("Moins de valeurs que de triangles annoncés dans le .cir")
+        morceaux.append(f"f{i} {nb_tri}\n")
+        morceaux.append(("\t%.2f\n" * nb_tri) % tuple(vals[k:k + nb_tri]))
+        k += nb_tri
+
+    # Un seul appel d'écriture pour tout le fichier
     with open(chemin_sortie, "w", encoding="utf-8") as f:
-        f.write(f"{nb_facettes} {nb_facettes}\t {vmin:.2f} {vmax:.2f}\n")
-
-        k = 0
-        for i, nb_tri in enumerate(tailles_facettes, start=1):
-            f.write(f"f{i} {int(nb_tri)}\n")
-            for _ in range(int(nb_tri)):
-                v = float(val_tri[k])
-                if not np.isfinite(v):
-                    v = 0.0
-                f.write(f"\t{v:.2f}\n")
-                k += 1
+        f.write("".join(morceaux))
 
 
 def mh_vers_sm_val(mh_txt, cir, val_sortie, pondere=False):
@@ -460,14 +696,13 @@ def mh_vers_sm_val(mh_txt, cir, val_sortie, pondere=False):
         val, nf, ntri, tx_ty, nodata
     """
     ras, gt, nodata = lire_mh_ascii(mh_txt)
-    tailles, pts, tri = lire_scene_triangle_cir(cir)
-
-    pts2, (tx, ty) = aligner_par_bbox(pts, gt, ras.shape)
+    tailles, _, tri = lire_scene_triangle_cir_cache(cir)
 
-    map_px = mapping_surface(pts2, tri, gt, ras.shape)
-    tri_px = inverser_mapping(map_px, len(tri))
+    (lignes, colonnes, ids_tri, aires), (tx, ty) = mapping_cir_cache(cir, ras.shape, gt)
 
-    val_tri = moyenne_pixels_par_triangle(ras, tri_px, pondere=pondere, rempl=np.nan)
+    val_tri = moyenne_pixels_par_triangle_plat(
+        ras, lignes, colonnes, ids_tri, aires, len(tri), pondere=pondere, rempl=np.nan
+    )
 
     ecrire_val(val_sortie, tailles, val_tri)
 
@@ -497,29 +732,127 @@ def lire_val(chemin_val):
     Remarque
     --------
     Le fichier .val contient des blocs par facette. La lecture conserve l'ordre.
+    Les lignes "fX N" sont repérées par une expression régulière sur le contenu
+    brut du fichier, puis chaque bloc de valeurs est converti en une fois par
+    np.loadtxt (première colonne uniquement). Une facette qui contient moins
+    de valeurs qu'annoncé lève ValueError.
     """
-    valeurs = []
+    with open(chemin_val, "rb") as f:
+        contenu = f.read()
+
+    # La première ligne non vide est un en-tête, on ne cherche les facettes qu'après
+    debut = len(contenu) - len(contenu.lstrip())
+    fin_entete = contenu.find(b"\n", debut)
+    if fin_entete < 0:
+        return np.asarray([], dtype=float)
+
+    entetes = list(_RE_FACETTE_VAL.finditer(contenu, fin_entete))
+
+    blocs = []
+    for k, m in enumerate(entetes):
+        nb = int(m.group(1))
+        if nb <= 0:
+            continue
+
+        fin = entetes[k + 1].start() if k + 1 < len(entetes) else len(contenu)
+        bloc = contenu[m.end():fin]
+
+        # Bloc vide : pas d'appel à np.loadtxt (qui avertirait sans échouer)
+        if bloc.strip():
+            vals = np.loadtxt(BytesIO(bloc), dtype=float, usecols=0, ndmin=1)
+        else:
+            vals = np.empty(0, dtype=float)
 
-    with open(chemin_val, "r", errors="ignore") as f:
-        lignes = [l.strip() for l in f if l.strip()]
+        # Une facette incomplète décalerait toutes les valeurs suivantes
+        if vals.size < nb:
+            entete = m.group(0).decode(errors="replace").strip()
+            raise ValueError(
+                "Facette incomplète dans " + str(chemin_val) + " : '" + entete + "' annonce "
+                + str(nb) + " valeurs, " + str(vals.size) + " trouvées"
+            )
 
-    if not lignes:
+        blocs.append(vals[:nb])
+
+    if not blocs:
         return np.asarray([], dtype=float)
 
-    i = 1
-    while i < len(lignes):
-        s = lignes[i]
-        if s.startswith("f"):
-            nb = int(s.split()[1])
-            i += 1
-            for _ in range(nb):
-                v = float(lignes[i].replace("\t", " ").split()[0])
-                valeurs.append(v)
-                i += 1
+    return np.concatenate(blocs)
+
+
+def moyenne_triangles_par_pixel(val_tri, lignes, colonnes, ids_tri, aires, forme_ras, pondere=False,
+                                dtype=np.float64):
+    """
+    Calcule une valeur par pixel à partir des triangles qui l'intersectent.
+
+    L'agrégation est faite en une passe avec np.bincount sur l'indice linéaire
+    des pixels (ligne * nb_colonnes + colonne).
+
+    Paramètres
+    ----------
+    val_tri : np.ndarray
+        Valeurs par triangle (ordre du .cir).
+    lignes, colonnes, ids_tri, aires : np.ndarray
+        Mapping pixel triangle à plat, renvoyé par mapping_surface_plat.
+    forme_ras : tuple[int, int]
+        Forme du raster (nb_lignes, nb_colonnes).
+    pondere : bool
+        Si True, moyenne pondérée par aire d'intersection (les triangles sans
+        valeur finie ou d'aire nulle sont ignorés).
+        Si False, moyenne simple.
+    dtype : type numpy
+        Type du raster renvoyé. Les sommes sont toujours accumulées en float64,
+        seule la division finale écrit dans ce type (float32 pour un GeoTIFF).
+
+    Retour
+    ------
+    np.ndarray
+        Raster (nb_lignes, nb_colonnes), NaN sur les pixels non couverts.
+
+    Remarque
+    --------
+    Les indices de triangles absents de val_tri (fichier .val trop court)
+    sont ignorés.
+    """
+    nb_lignes, nb_colonnes = forme_ras
+    nb_pixels = nb_lignes * nb_colonnes
+
+    val_tri = np.asarray(val_tri, dtype=float)
+
+    # Indice linéaire en int32 tant que la grille le permet (moitié moins
+    # d'octets à lire et écrire qu'en int64)
+    type_plat = np.int32 if nb_pixels <= np.iinfo(np.int32).max else np.int64
+
+    # Filtrage seulement si le .val est trop court : évite quatre copies
+    # masquées dans le cas courant
+    if ids_tri.size and int(ids_tri.max()) >= val_tri.size:
+        ok = ids_tri < val_tri.size
+        lignes, colonnes, ids_tri, aires = lignes[ok], colonnes[ok], ids_tri[ok], aires[ok]
+
+    plat = lignes.astype(type_plat) * type_plat(nb_colonnes)
+    plat += colonnes
+    vt = val_tri[ids_tri]
+
+    if pondere:
+        garde = np.isfinite(vt) & (aires > 0.0)
+        if garde.all():
+            a = aires
         else:
-            i += 1
+            plat, vt, a = plat[garde], vt[garde], aires[garde]
+        vt *= a
+        num = np.bincount(plat, weights=vt, minlength=nb_pixels)
+        den = np.bincount(plat, weights=a, minlength=nb_pixels)
+    else:
+        num = np.bincount(plat, weights=vt, minlength=nb_pixels)
+        den = np.bincount(plat, minlength=nb_pixels)
+
+    # Un seul tampon de sortie : la division n'écrit que les pixels couverts,
+    # les autres reçoivent NaN ensuite (pas de pré-remplissage complet)
+    couvert = den > 0
+    ras_rec = np.empty(nb_pixels, dtype=dtype)
+    np.divide(num, den, out=ras_rec, where=couvert, casting="same_kind")
+    ras_rec[~couvert] = np.nan
 
-    return np.asarray(valeurs, dtype=float)
+    return ras_rec.reshape((nb_lignes, nb_colonnes))
 
 
 def sm_vers_mh_raster(mh_txt_ref, cir, val_path, pondere=False):
@@ -555,38 +888,14 @@ def sm_vers_mh_raster(mh_txt_ref, cir, val_path, pondere=False):
         nd : NODATA de référence (-9999)
     """
     ras_ref, gt, nodata = lire_mh_ascii(mh_txt_ref)
-    _, pts, tri = lire_scene_triangle_cir(cir)
 
-    pts2, _ = aligner_par_bbox(pts, gt, ras_ref.shape)
-    map_px = mapping_surface(pts2, tri, gt, ras_ref.shape)
+    (lignes, colonnes, ids_tri, aires), _ = mapping_cir_cache(cir, ras_ref.shape, gt)
 
     val_tri = lire_val(val_path)
 
-    nb_lignes, nb_colonnes = ras_ref.shape
-    ras_rec = np.full((nb_lignes, nb_colonnes), np.nan, dtype=float)
-
-    for (lig, col), lst in map_px.items():
-        if not lst:
-            continue
-
-        if not pondere:
-            vals = [float(val_tri[int(id_tri)]) for (id_tri, aire) in lst]
-            if vals:
-                ras_rec[lig, col] = float(np.mean(vals))
-        else:
-            num = 0.0
-            den = 0.0
-            for id_tri, aire in lst:
-                a = float(aire)
-                if a <= 0.0:
-                    continue
-                vt = float(val_tri[int(id_tri)])
-                if not np.isfinite(vt):
-                    continue
-                num += vt * a
-                den += a
-            if den > 0.0:
-                ras_rec[lig, col] = num / den
+    ras_rec = moyenne_triangles_par_pixel(
+        val_tri, lignes, colonnes, ids_tri, aires, ras_ref.shape, pondere=pondere
+    )
 
     return ras_rec, gt, float(nodata)
 
@@ -630,11 +939,14 @@ def ecrire_mh_ascii(chemin_sortie, ras, gt, nodata=NODATA_MH):
         f.write(f"cellsize      {pas}\n")
         f.write(f"NODATA_value  {float(nodata)}\n")
 
-        data = ras.astype(float, copy=True)
-        data[~np.isfinite(data)] = float(nodata)
-
-        for lig in range(nb_lignes):
-            f.write(" ".join(f"{v:.6g}" for v in data[lig, :]) + "\n")
+        # Écriture par blocs de lignes : seule une copie d'un bloc (NaN et inf
+        # remplacés en place par nodata) existe à un instant donné, jamais une
+        # copie complète du raster. Chaque ligne est formatée par np.savetxt
+        # avec une seule chaîne de format.
+        for debut in range(0, nb_lignes, LIGNES_BLOC_ASCII):
+            bloc = np.nan_to_num(ras[debut:debut + LIGNES_BLOC_ASCII].astype(float, copy=True), copy=False,
+                                 nan=float(nodata), posinf=float(nodata), neginf=float(nodata))
+            np.savetxt(f, bloc, fmt="%.6g", delimiter=" ")
 
 
 def mh_txt_to_sm_val(mh_txt_path, cir_path, out_val_path, weighted_by_area=False):
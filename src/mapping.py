@@ -20,8 +20,23 @@ Le mapping "surface-based" est utilisé pour les conversions MH vers SM et SM ve
 car il est plus cohérent géométriquement.
 """
 
+from itertools import chain
+
 import numpy as np
-from shapely.geometry import Polygon, box
+
+from .preprocessing import barycentres_triangles
+
+# Nombre maximal de paires (triangle, pixel candidat) traitées d'un coup par
+# mapping_surface_plat : borne la mémoire des tableaux intermédiaires
+TAILLE_BLOC_PAIRES = 1 << 20
+
+# Aire minimale d'une paire (triangle, pixel), relative à l'aire du pixel. En
+# dessous, la paire est un résidu de découpe (triangle quasi vertical, bord
+# effleuré) qui pèserait autant qu'un triangle entier dans une moyenne non pondérée
+TOLERANCE_AIRE_PIXEL = 1e-9
+
+# Agrégateurs acceptés par projette_triangles_vers_raster
+AGREGATEURS = ("mean", "median", "sum", "min", "max", "first", "count", "mode")
 
 
 def xy_vers_pixel(x, y, gt):
@@ -56,7 +71,7 @@ def xy_vers_pixel(x, y, gt):
     return ligne, colonne
 
 
-def mapping_barycentre(points, triangles, gt, shape_raster):
+def mapping_barycentre(points, triangles, gt, shape_raster, bary=None):
     """
     Associe chaque triangle à un pixel en utilisant le barycentre XY du triangle.
 
@@ -73,6 +88,9 @@ def mapping_barycentre(points, triangles, gt, shape_raster):
         Géotransformée GDAL du raster.
     shape_raster : tuple
         Forme du raster (nb_lignes, nb_colonnes).
+    bary : np.ndarray ou None
+        Barycentres des triangles déjà calculés (voir barycentres_triangles),
+        seules les colonnes X et Y sont utilisées. Si None, ils sont calculés ici.
 
     Retour
     ------
@@ -81,29 +99,106 @@ def mapping_barycentre(points, triangles, gt, shape_raster):
         mapping[(ligne, colonne)] = [id_triangle, id_triangle, ...]
         Un pixel peut contenir plusieurs triangles.
     """
+    lignes, colonnes, ids_tri = mapping_barycentre_plat(points, triangles, gt, shape_raster, bary=bary)
+
+    # Entrées déjà triées par pixel : une tranche de ids_tri par pixel, les
+    # débuts de tranche se lisent directement sans nouveau tri
+    pixels = lignes * int(shape_raster[1]) + colonnes
+    debuts = np.flatnonzero(np.diff(pixels, prepend=-1))
+    fins = np.append(debuts[1:], pixels.size).tolist()
+    ids = ids_tri.tolist()
+
+    return {
+        (ligne, colonne): ids[debut:fin]
+        for ligne, colonne, debut, fin in zip(lignes[debuts].tolist(), colonnes[debuts].tolist(),
+                                              debuts.tolist(), fins)
+    }
+
+
+def mapping_barycentre_plat(points, triangles, gt, shape_raster, bary=None):
+    """
+    Mapping barycentre sous forme de tableaux plats, sans boucle Python.
+
+    Même règle que mapping_barycentre (même conversion que xy_vers_pixel,
+    troncature vers zéro), appliquée à tous les barycentres d'un coup.
+
+    Paramètres
+    ----------
+    points : np.ndarray
+        Tableau (N, 3) des coordonnées xyz.
+    triangles : np.ndarray
+        Tableau (M, 3) des indices de sommets.
+    gt : tuple
+        Géotransformée GDAL du raster.
+    shape_raster : tuple
+        Forme du raster (nb_lignes, nb_colonnes).
+    bary : np.ndarray ou None
+        Barycentres déjà calculés, comme pour mapping_barycentre.
+
+    Retour
+    ------
+    tuple[np.ndarray, np.ndarray, np.ndarray]
+        lignes, colonnes, ids_tri (int64), une entrée par triangle dans la
+        grille. Les entrées sont triées par pixel (ligne puis colonne), et
+        par indice de triangle pour un même pixel.
+    """
     nb_lignes, nb_colonnes = shape_raster
-    mapping = {}
 
-    triangles_xy = points[triangles][:, :, :2]
-    barycentres = triangles_xy.mean(axis=1)
+    if bary is None:
+        bary = barycentres_triangles(np.asarray(points)[:, :2], triangles)
+    barycentres = np.asarray(bary)
 
-    for id_tri, (x, y) in enumerate(barycentres):
-        ligne, colonne = xy_vers_pixel(float(x), float(y), gt)
+    with np.errstate(invalid="ignore"):
+        colonne = (barycentres[:, 0] - gt[0]) / gt[1]
+        ligne = (barycentres[:, 1] - gt[3]) / gt[5]
 
-        if not (0 <= ligne < nb_lignes and 0 <= colonne < nb_colonnes):
-            continue
+    # Coordonnées non finies écartées avant la conversion entière
+    ok = np.isfinite(colonne) & np.isfinite(ligne)
+    ids_tri = np.flatnonzero(ok)
+    colonne = colonne[ok].astype(np.int64)
+    ligne = ligne[ok].astype(np.int64)
 
-        mapping.setdefault((ligne, colonne), []).append(int(id_tri))
+    dans_grille = (ligne >= 0) & (ligne < nb_lignes) & (colonne >= 0) & (colonne < nb_colonnes)
+    ids_tri = ids_tri[dans_grille]
+    ligne = ligne[dans_grille]
+    colonne = colonne[dans_grille]
 
-    return mapping
+    ordre = np.argsort(ligne * nb_colonnes + colonne, kind="stable")
+
+    return ligne[ordre], colonne[ordre], ids_tri[ordre]
 
 
-def projette_triangles_vers_raster(valeurs, mapping, shape_raster, agg="mean", fill=np.nan):
+def _aplatir_mapping_pixels(mapping):
+    """
+    Mapping pixel -> triangles (dict ou tableaux plats) sous forme de tableaux plats.
+
+    Retour
+    ------
+    tuple[np.ndarray, np.ndarray, np.ndarray]
+        lignes, colonnes, ids_tri (int64), une entrée par couple pixel triangle.
+    """
+    if not isinstance(mapping, dict):
+        lignes, colonnes, ids_tri = mapping
+        return (np.asarray(lignes, dtype=np.int64), np.asarray(colonnes, dtype=np.int64),
+                np.asarray(ids_tri, dtype=np.int64))
+
+    pixels = np.fromiter(chain.from_iterable(mapping.keys()), dtype=np.int64,
+                         count=2 * len(mapping)).reshape(-1, 2)
+    nb_par_pixel = np.fromiter(map(len, mapping.values()), dtype=np.int64, count=len(mapping))
+    ids_tri = np.fromiter(chain.from_iterable(mapping.values()), dtype=np.int64,
+                          count=int(nb_par_pixel.sum()))
+
+    return np.repeat(pixels[:, 0], nb_par_pixel), np.repeat(pixels[:, 1], nb_par_pixel), ids_tri
+
+
+def projette_triangles_vers_raster(valeurs, mapping, shape_raster, agg="mean", fill=np.nan,
+                                   dtype=np.float32):
     """
     Projette un champ défini sur les triangles vers une grille raster.
 
     Le mapping attendu est celui produit par mapping_barycentre :
-    mapping[(ligne, colonne)] = liste d'indices de triangles.
+    mapping[(ligne, colonne)] = liste d'indices de triangles,
+    ou sa forme à plat (lignes, colonnes, ids_tri) produite par mapping_barycentre_plat.
 
     Si plusieurs triangles tombent dans le même pixel, une agrégation est appliquée.
 
@@ -111,8 +206,9 @@ def projette_triangles_vers_raster(valeurs, mapping, shape_raster, agg="mean", f
     ----------
     valeurs : array_like
         Tableau (n_tri,) contenant une valeur par triangle.
-    mapping : dict
-        Dictionnaire pixel -> liste d'indices de triangles.
+    mapping : dict or tuple
+        Dictionnaire pixel -> liste d'indices de triangles, ou tableaux plats
+        (lignes, colonnes, ids_tri).
     shape_raster : tuple
         Forme du raster (nb_lignes, nb_colonnes).
     agg : str
@@ -121,58 +217,112 @@ def projette_triangles_vers_raster(valeurs, mapping, shape_raster, agg="mean", f
         mean, median, sum, min, max, first, count, mode
     fill : float
         Valeur par défaut utilisée pour initialiser le raster de sortie.
+    dtype : type numpy
+        Type du tableau de sortie (float32 par défaut : les valeurs MH y
+        tiennent sans perte utile, les calculs intermédiaires restent en
+        float64).
 
     Retour
     ------
     np.ndarray
-        Raster 2D (nb_lignes, nb_colonnes) en float.
+        Raster 2D (nb_lignes, nb_colonnes) de type dtype.
     """
+    if agg not in AGREGATEURS:
+        raise ValueError("Agrégateur inconnu " + str(agg))
+
     nb_lignes, nb_colonnes = shape_raster
-    raster = np.full((nb_lignes, nb_colonnes), fill, dtype=float)
 
-    valeurs = np.asarray(valeurs, dtype=float)
+    lignes, colonnes, ids_tri = _aplatir_mapping_pixels(mapping)
+    pixel = lignes * nb_colonnes + colonnes
 
-    for (ligne, colonne), ids_triangles in mapping.items():
-        if not ids_triangles:
-            continue
+    v = None if agg == "count" else np.asarray(valeurs, dtype=float)[ids_tri]
+    raster = _agrege_pixels(v, pixel, nb_lignes * nb_colonnes, agg, fill, dtype)
 
-        if agg == "count":
-            raster[ligne, colonne] = float(len(ids_triangles))
-            continue
+    return raster.reshape((nb_lignes, nb_colonnes))
 
-        v = valeurs[ids_triangles]
 
-        if np.all(np.isnan(v)):
-            continue
+def _agrege_pixels(v, pixel, nb_pixels, agg, fill, dtype):
+    """
+    Agrège par pixel des valeurs déjà associées aux entrées du mapping.
 
+    Paramètres
+    ----------
+    v : np.ndarray or None
+        Valeur du triangle de chaque entrée du mapping (ignorée pour count).
+    pixel : np.ndarray
+        Indice linéaire du pixel de chaque entrée (ligne * nb_colonnes + colonne).
+    nb_pixels : int
+        Nombre total de pixels du raster.
+    agg, fill, dtype :
+        Voir projette_triangles_vers_raster.
+
+    Retour
+    ------
+    np.ndarray
+        Raster à plat (nb_pixels,) de type dtype.
+    """
+    raster = np.full(nb_pixels, fill, dtype=dtype)
+
+    if agg == "count":
+        comptes = np.bincount(pixel, minlength=nb_pixels)
+        raster[comptes > 0] = comptes[comptes > 0]
+        return raster
+
+    # Les triangles sans valeur (NaN) sont ignorés, un pixel sans aucune
+    # valeur garde fill
+    garde = ~np.isnan(v)
+    pixel = pixel[garde]
+    v = v[garde]
+    rempli = np.bincount(pixel, minlength=nb_pixels) > 0
+
+    # Agrégateurs réductibles : une passe numpy sur tous les pixels
+    if agg in ("mean", "sum"):
+        somme = np.bincount(pixel, weights=v, minlength=nb_pixels)
         if agg == "mean":
-            raster[ligne, colonne] = float(np.nanmean(v))
-        elif agg == "median":
-            raster[ligne, colonne] = float(np.nanmedian(v))
-        elif agg == "sum":
-            raster[ligne, colonne] = float(np.nansum(v))
-        elif agg == "min":
-            raster[ligne, colonne] = float(np.nanmin(v))
-        elif agg == "max":
-            raster[ligne, colonne] = float(np.nanmax(v))
-        elif agg == "first":
-            for valeur in v:
-                if not np.isnan(valeur):
-                    raster[ligne, colonne] = float(valeur)
-                    break
-        elif agg == "mode":
-            vv = v[~np.isnan(v)]
-            if vv.size == 0:
-                continue
-            uniques, comptes = np.unique(vv, return_counts=True)
-            raster[ligne, colonne] = float(uniques[int(np.argmax(comptes))])
-        else:
-            raise ValueError("Agrégateur inconnu " + str(agg))
+            somme[rempli] /= np.bincount(pixel, minlength=nb_pixels)[rempli]
+        raster[rempli] = somme[rempli]
+        return raster
+
+    if agg in ("min", "max"):
+        extreme = np.full(nb_pixels, np.inf if agg == "min" else -np.inf)
+        (np.minimum if agg == "min" else np.maximum).at(extreme, pixel, v)
+        raster[rempli] = extreme[rempli]
+        return raster
+
+    if agg == "first":
+        # Premier triangle du mapping pour chaque pixel (tri stable par pixel)
+        ordre = np.argsort(pixel, kind="stable")
+        uniques, debuts = np.unique(pixel[ordre], return_index=True)
+        raster[uniques] = v[ordre][debuts]
+        return raster
+
+    # median, mode : valeurs triées par pixel puis par valeur
+    ordre = np.lexsort((v, pixel))
+    pixel = pixel[ordre]
+    v = v[ordre]
+
+    if agg == "median":
+        uniques, debuts, comptes = np.unique(pixel, return_index=True, return_counts=True)
+        raster[uniques] = 0.5 * (v[debuts + (comptes - 1) // 2] + v[debuts + comptes // 2])
+        return raster
+
+    # mode : plus longue série de valeurs égales dans chaque pixel, la plus
+    # petite valeur en cas d'égalité (comme np.unique + np.argmax)
+    nouvelle = np.ones(pixel.size, dtype=bool)
+    nouvelle[1:] = (pixel[1:] != pixel[:-1]) | (v[1:] != v[:-1])
+    debuts = np.flatnonzero(nouvelle)
+    longueurs = np.diff(np.append(debuts, pixel.size))
+    series = np.lexsort((v[debuts], -longueurs, pixel[debuts]))
+    pixel_series = pixel[debuts][series]
+    premiere = np.ones(series.size, dtype=bool)
+    premiere[1:] = pixel_series[1:] != pixel_series[:-1]
+    raster[pixel_series[premiere]] = v[debuts][series][premiere]
 
     return raster
 
 
-def projette_plusieurs_champs(champs_triangles, mapping, shape_raster, agg="mean", fill=np.nan):
+def projette_plusieurs_champs(champs_triangles, mapping, shape_raster, agg="mean", fill=np.nan,
+                              dtype=np.float32):
     """
     Projette plusieurs champs triangles vers des rasters en une seule passe logique.
 
@@ -180,30 +330,52 @@ def projette_plusieurs_champs(champs_triangles, mapping, shape_raster, agg="mean
     ----------
     champs_triangles : dict
         Dictionnaire {nom_champ: valeurs_triangles}, où valeurs_triangles a une taille (n_tri,).
-    mapping : dict
-        Dictionnaire pixel -> liste de triangles (mapping barycentre).
+    mapping : dict or tuple
+        Dictionnaire pixel -> liste de triangles (mapping barycentre), ou sa
+        forme à plat (lignes, colonnes, ids_tri).
     shape_raster : tuple
         Forme du raster (nb_lignes, nb_colonnes).
     agg : str
         Agrégation à appliquer dans projette_triangles_vers_raster.
     fill : float
         Valeur par défaut du raster.
+    dtype : type numpy
+        Type des rasters de sortie, voir projette_triangles_vers_raster.
 
     Retour
     ------
     dict
         Dictionnaire {nom_champ: raster_2d}.
     """
+    if agg not in AGREGATEURS:
+        raise ValueError("Agrégateur inconnu " + str(agg))
+
+    nb_lignes, nb_colonnes = shape_raster
+    nb_pixels = nb_lignes * nb_colonnes
+
+    # Mapping mis à plat et indices pixel calculés une seule fois pour tous les champs
+    lignes, colonnes, ids_tri = _aplatir_mapping_pixels(mapping)
+    pixel = lignes * nb_colonnes + colonnes
+
+    noms = list(champs_triangles)
     rasters = {}
 
-    for nom, valeurs in champs_triangles.items():
-        rasters[nom] = projette_triangles_vers_raster(
-            valeurs=valeurs,
-            mapping=mapping,
-            shape_raster=shape_raster,
-            agg=agg,
-            fill=fill
-        )
+    if agg == "count":
+        # Ne dépend pas des valeurs : un seul raster partagé (copié par champ)
+        comptes = _agrege_pixels(None, pixel, nb_pixels, agg, fill, dtype)
+        for nom in noms:
+            rasters[nom] = comptes.reshape((nb_lignes, nb_colonnes)).copy()
+        return rasters
+
+    # Champs empilés (K, n_tri) : une seule lecture indexée du mapping pour
+    # tous les champs, chaque ligne restant contiguë pour l'agrégation
+    if noms:
+        V = np.vstack([np.asarray(champs_triangles[nom], dtype=float) for nom in noms])
+        V = V[:, ids_tri]
+
+    for k, nom in enumerate(noms):
+        raster = _agrege_pixels(V[k], pixel, nb_pixels, agg, fill, dtype)
+        rasters[nom] = raster.reshape((nb_lignes, nb_colonnes))
 
     return rasters
 
@@ -214,12 +386,14 @@ def inverse_mapping(mapping_pixel, nb_triangles):
 
     Règle utilisée ici :
     - chaque triangle est associé au premier pixel rencontré dans le dictionnaire
-      si jamais il apparaît dans plusieurs pixels (cas rare avec le barycentre).
+      (ou dans les tableaux plats) si jamais il apparaît dans plusieurs pixels
+      (cas rare avec le barycentre).
 
     Paramètres
     ----------
-    mapping_pixel : dict
-        Dictionnaire pixel -> liste d'indices de triangles.
+    mapping_pixel : dict or tuple
+        Dictionnaire pixel -> liste d'indices de triangles, ou sa forme à plat
+        (lignes, colonnes, ids_tri) produite par mapping_barycentre_plat.
     nb_triangles : int
         Nombre total de triangles.
 
@@ -231,15 +405,445 @@ def inverse_mapping(mapping_pixel, nb_triangles):
     """
     tri_vers_pixel = np.full((int(nb_triangles), 2), -1, dtype=int)
 
-    for (ligne, colonne), ids_triangles in mapping_pixel.items():
-        for id_tri in ids_triangles:
-            if tri_vers_pixel[int(id_tri), 0] == -1:
-                tri_vers_pixel[int(id_tri), 0] = int(ligne)
-                tri_vers_pixel[int(id_tri), 1] = int(colonne)
+    lignes, colonnes, ids_tri = _aplatir_mapping_pixels(mapping_pixel)
+
+    # Première occurrence de chaque triangle dans l'ordre du mapping
+    ids_uniques, premieres = np.unique(ids_tri, return_index=True)
+    tri_vers_pixel[ids_uniques, 0] = lignes[premieres]
+    tri_vers_pixel[ids_uniques, 1] = colonnes[premieres]
 
     return tri_vers_pixel
 
 
+def mapping_surface_plat(points, triangles, gt, shape_raster):
+    """
+    Mapping surface-based (intersection triangle / pixel) sous forme de tableaux plats.
+
+    Même calcul que mapping_surface, mais chaque intersection pixel triangle
+    est rangée dans quatre tableaux 1D de même longueur au lieu d'un dictionnaire.
+    Cette forme permet d'agréger les valeurs avec numpy (np.bincount) sans
+    boucle Python sur les pixels.
+
+    Les triangles sont traités par blocs, sans boucle Python par triangle. Pour
+    chaque triangle et chaque ligne de pixels de sa bbox, seules les colonnes
+    couvertes par le triangle dans cette bande sont candidates. Les fonctions
+    d'arête classent ensuite chaque pixel candidat. Les pixels entièrement intérieurs reçoivent directement
+    l'aire du pixel, les pixels entièrement extérieurs sont ignorés, et seuls
+    les pixels traversés par une arête passent par le découpage analytique
+    (_aires_decoupe_pixels). Les résidus de découpe (aire inférieure à
+    TOLERANCE_AIRE_PIXEL fois l'aire du pixel) sont écartés, sauf la plus
+    grande intersection de chaque triangle.
+
+    Paramètres
+    ----------
+    points : np.ndarray
+        Tableau (N, 3) des coordonnées xyz.
+    triangles : np.ndarray
+        Tableau (M, 3) des indices de sommets.
+    gt : tuple
+        Géotransformée GDAL du raster.
+    shape_raster : tuple
+        Forme du raster (nb_lignes, nb_colonnes).
+
+    Retour
+    ------
+    tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        lignes : int32, ligne du pixel intersecté
+        colonnes : int32, colonne du pixel intersecté
+        ids_tri : int32, indice du triangle
+        aires : float64, aire d'intersection
+        Les entrées sont groupées par triangle (triangles pris dans l'ordre de
+        Morton de leur barycentre), puis ligne par ligne.
+    """
+    x0, dx, _, y0, _, dy = gt
+
+    aire_pixel = abs(float(dx) * float(dy))
+
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    sommets = np.asarray(points, dtype=float)[:, :2][triangles]
+
+    # Aire signée (x2) : triangles dégénérés écartés, les autres remis dans le
+    # sens trigonométrique (intérieur du côté positif des fonctions d'arête)
+    ab = sommets[:, 1] - sommets[:, 0]
+    ac = sommets[:, 2] - sommets[:, 0]
+    aire2 = ab[:, 0] * ac[:, 1] - ac[:, 0] * ab[:, 1]
+
+    horaire = aire2 < 0.0
+    sommets[horaire] = sommets[horaire][:, [0, 2, 1]]
+
+    valide = np.isfinite(aire2) & (aire2 != 0.0)
+    col_min, lig_min, larg, haut = _bbox_pixels_triangles(sommets, valide, gt, shape_raster)
+    valide &= (larg > 0) & (haut > 0)
+
+    ids_valides = np.flatnonzero(valide)
+
+    # Parcours des triangles dans l'ordre de Morton de leur barycentre : deux
+    # triangles consécutifs touchent des pixels voisins, les blocs restent compacts
+    ids_valides = ids_valides[np.argsort(_code_morton(sommets[ids_valides].mean(axis=1)), kind="stable")]
+    nb_paires = (larg * haut)[ids_valides]
+
+    lignes = []
+    colonnes = []
+    ids_tri = []
+    aires = []
+
+    # Traitement par blocs de triangles pour borner la mémoire des paires
+    # (triangle, pixel candidat). La taille de la bbox majore le nombre de
+    # paires réellement générées (voir _plages_colonnes)
+    bornes = np.cumsum(nb_paires)
+    debut = 0
+    while debut < ids_valides.size:
+        deja = bornes[debut - 1] if debut > 0 else 0
+        fin = int(np.searchsorted(bornes, deja + TAILLE_BLOC_PAIRES, side="right"))
+        fin = max(fin, debut + 1)
+
+        res = _intersections_bloc(
+            sommets, ids_valides[debut:fin],
+            col_min, lig_min, larg, haut, x0, dx, y0, dy, aire_pixel,
+        )
+        lignes.append(res[0])
+        colonnes.append(res[1])
+        ids_tri.append(res[2])
+        aires.append(res[3])
+
+        debut = fin
+
+    if not lignes:
+        vide = np.zeros(0, dtype=np.int32)
+        return vide, vide.copy(), vide.copy(), np.zeros(0, dtype=np.float64)
+
+    return (
+        np.concatenate(lignes).astype(np.int32, copy=False),
+        np.concatenate(colonnes).astype(np.int32, copy=False),
+        np.concatenate(ids_tri).astype(np.int32, copy=False),
+        np.concatenate(aires).astype(np.float64, copy=False),
+    )
+
+
+def _bbox_pixels_triangles(sommets, valide, gt, shape_raster):
+    """
+    Boite englobante en pixels de chaque triangle, bornée à la grille.
+
+    Seuls les pixels de cette boite sont testés par le mapping surface-based,
+    jamais la grille entière.
+
+    Paramètres
+    ----------
+    sommets : np.ndarray
+        Tableau (M, 3, 2) des sommets XY des triangles.
+    valide : np.ndarray
+        Tableau (M,) bool. Les triangles non valides reçoivent une boite vide.
+    gt : tuple
+        Géotransformée GDAL du raster.
+    shape_raster : tuple
+        Forme du raster (nb_lignes, nb_colonnes).
+
+    Retour
+    ------
+    tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        col_min, lig_min, larg, haut (int64). larg ou haut est <= 0 si la
+        boite est vide (triangle hors grille ou non valide).
+    """
+    nb_lignes, nb_colonnes = shape_raster
+    x0, dx, _, y0, _, dy = gt
+
+    # Réduction sommet par sommet : bien plus rapide qu'un min(axis=1) sur un
+    # axe de longueur 3
+    mini = np.minimum(np.minimum(sommets[:, 0], sommets[:, 1]), sommets[:, 2])
+    maxi = np.maximum(np.maximum(sommets[:, 0], sommets[:, 1]), sommets[:, 2])
+
+    with np.errstate(invalid="ignore"):
+        col_min = np.floor((mini[:, 0] - x0) / dx)
+        col_max = np.floor((maxi[:, 0] - x0) / dx)
+        lig_min = np.floor((maxi[:, 1] - y0) / dy)
+        lig_max = np.floor((mini[:, 1] - y0) / dy)
+
+    col_min = np.clip(np.where(valide, col_min, 0), 0, None).astype(np.int64)
+    lig_min = np.clip(np.where(valide, lig_min, 0), 0, None).astype(np.int64)
+    col_max = np.clip(np.where(valide, col_max, -1), None, nb_colonnes - 1).astype(np.int64)
+    lig_max = np.clip(np.where(valide, lig_max, -1), None, nb_lignes - 1).astype(np.int64)
+
+    return col_min, lig_min, col_max - col_min + 1, lig_max - lig_min + 1
+
+
+def _code_morton(xy):
+    """
+    Code de Morton (Z-order) de points 2D, quantifiés sur 16 bits par axe.
+
+    Paramètres
+    ----------
+    xy : np.ndarray
+        Tableau (N, 2) des coordonnées.
+
+    Retour
+    ------
+    np.ndarray
+        Tableau (N,) uint64, les bits de x et y entrelacés.
+    """
+    if len(xy) == 0:
+        return np.zeros(0, dtype=np.uint64)
+
+    mini = xy.min(axis=0)
+    etendue = xy.max(axis=0) - mini
+    etendue[etendue <= 0] = 1.0
+
+    q = ((xy - mini) / etendue * 0xFFFF).astype(np.uint64)
+
+    code = np.zeros(len(xy), dtype=np.uint64)
+    for axe in range(2):
+        v = q[:, axe]
+        v = (v | (v << np.uint64(8))) & np.uint64(0x00FF00FF)
+        v = (v | (v << np.uint64(4))) & np.uint64(0x0F0F0F0F)
+        v = (v | (v << np.uint64(2))) & np.uint64(0x33333333)
+        v = (v | (v << np.uint64(1))) & np.uint64(0x55555555)
+        code |= v << np.uint64(axe)
+
+    return code
+
+
+def _plages_colonnes(sommets, y_bas, y_haut, x0, dx, col_min, col_max):
+    """
+    Colonnes de pixels couvertes par des triangles dans des bandes horizontales.
+
+    L'intersection d'un triangle avec la bande [y_bas, y_haut] est un polygone
+    convexe dont les sommets sont les extrémités des arêtes découpées par la
+    bande : son étendue en x est donc celle de ces segments découpés.
+
+    Paramètres
+    ----------
+    sommets : np.ndarray
+        Tableau (R, 3, 2) des sommets XY du triangle de chaque bande.
+    y_bas, y_haut : np.ndarray
+        Tableaux (R,) des bornes de chaque bande.
+    x0, dx : float
+        Origine et pas en x de la grille.
+    col_min, col_max : np.ndarray
+        Tableaux (R,) des colonnes extrêmes de la bbox du triangle.
+
+    Retour
+    ------
+    tuple[np.ndarray, np.ndarray]
+        col_deb et nb_col (int64) : première colonne et nombre de colonnes
+        candidates de chaque bande (nb_col vaut 0 si la bande ne touche pas
+        le triangle).
+    """
+    x_min = np.full(len(sommets), np.inf)
+    x_max = np.full(len(sommets), -np.inf)
+
+    for k in range(3):
+        xa = sommets[:, k, 0]
+        ya = sommets[:, k, 1]
+        ux = sommets[:, (k + 1) % 3, 0] - xa
+        uy = sommets[:, (k + 1) % 3, 1] - ya
+
+        touche = (np.maximum(ya, ya + uy) >= y_bas) & (np.minimum(ya, ya + uy) <= y_haut)
+
+        # Portion [t0, t1] de l'arête comprise dans la bande (toute l'arête si
+        # elle est horizontale)
+        horizontale = uy == 0.0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ta = (y_bas - ya) / uy
+            tb = (y_haut - ya) / uy
+        t0 = np.where(horizontale, 0.0, np.clip(np.minimum(ta, tb), 0.0, 1.0))
+        t1 = np.where(horizontale, 1.0, np.clip(np.maximum(ta, tb), 0.0, 1.0))
+
+        xs0 = xa + t0 * ux
+        xs1 = xa + t1 * ux
+        x_min = np.where(touche, np.minimum(x_min, np.minimum(xs0, xs1)), x_min)
+        x_max = np.where(touche, np.maximum(x_max, np.maximum(xs0, xs1)), x_max)
+
+    # Marge relative minime : une colonne de trop est simplement rejetée par
+    # les fonctions d'arête, une colonne manquante perdrait une intersection
+    touche = np.isfinite(x_min)
+    with np.errstate(invalid="ignore"):
+        col_deb = np.floor((x_min - x0) / dx - 1e-7)
+        col_fin = np.floor((x_max - x0) / dx + 1e-7)
+
+    col_deb = np.maximum(np.where(touche, col_deb, 0), col_min).astype(np.int64)
+    col_fin = np.minimum(np.where(touche, col_fin, -1), col_max).astype(np.int64)
+
+    return col_deb, np.maximum(col_fin - col_deb + 1, 0)
+
+
+def _intersections_bloc(sommets, ids, col_min, lig_min, larg, haut, x0, dx, y0, dy, aire_pixel):
+    """
+    Intersections triangle / pixel pour un bloc de triangles, en une passe numpy.
+
+    Pour chaque triangle du bloc et chaque ligne de pixels de sa bbox, seules
+    les colonnes couvertes par le triangle dans la bande de la ligne sont
+    retenues (_plages_colonnes). Toutes les paires (triangle, pixel candidat)
+    du bloc sont ensuite générées d'un coup. Les fonctions d'arête, bornées
+    sur chaque pixel à partir de leur valeur au centre, classent chaque paire :
+    intérieure (aire du pixel), extérieure (ignorée) ou traversée par une
+    arête (découpage du triangle par le pixel).
+
+    Retour
+    ------
+    tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        lignes, colonnes, ids_tri, aires des paires retenues (aire supérieure
+        à TOLERANCE_AIRE_PIXEL fois l'aire du pixel, ou plus grande paire non
+        nulle du triangle), dans l'ordre des triangles de ids puis ligne par
+        ligne dans la bbox.
+    """
+    # Une entrée par (triangle, ligne de pixels de sa bbox)
+    nb_lig = haut[ids]
+    tri_lig = np.repeat(ids, nb_lig)
+    lig = lig_min[tri_lig] + np.arange(tri_lig.size) - np.repeat(np.cumsum(nb_lig) - nb_lig, nb_lig)
+
+    y_1 = y0 + lig * dy
+    y_2 = y0 + (lig + 1) * dy
+    col_deb, nb_col = _plages_colonnes(
+        sommets[tri_lig], np.minimum(y_1, y_2), np.maximum(y_1, y_2), x0, dx,
+        col_min[tri_lig], col_min[tri_lig] + larg[tri_lig] - 1,
+    )
+
+    # Une entrée par (triangle, pixel candidat), ligne par ligne
+    tri = np.repeat(tri_lig, nb_col)
+    ligne = np.repeat(lig, nb_col)
+    colonne = np.repeat(col_deb, nb_col) + np.arange(tri.size) - np.repeat(np.cumsum(nb_col) - nb_col, nb_col)
+
+    x_g = x0 + colonne * dx
+    x_d = x0 + (colonne + 1) * dx
+    y_h = y0 + ligne * dy
+    y_b = y0 + (ligne + 1) * dy
+    x_c = 0.5 * (x_g + x_d)
+    y_c = 0.5 * (y_h + y_b)
+    demi_dx = 0.5 * abs(dx)
+    demi_dy = 0.5 * abs(dy)
+
+    dedans = np.ones(tri.size, dtype=bool)
+    dehors = np.zeros(tri.size, dtype=bool)
+
+    s = sommets[tri]
+    for k in range(3):
+        px = s[:, k, 0]
+        py = s[:, k, 1]
+        ux = s[:, (k + 1) % 3, 0] - px
+        uy = s[:, (k + 1) % 3, 1] - py
+
+        # La fonction d'arête est affine : sur le pixel, ses extrema valent sa
+        # valeur au centre plus ou moins ce rayon (une évaluation au lieu de
+        # quatre coins)
+        e_centre = ux * (y_c - py) - uy * (x_c - px)
+        rayon = np.abs(uy) * demi_dx + np.abs(ux) * demi_dy
+
+        # Pixel entièrement du bon côté des trois arêtes : il est dans le triangle
+        dedans &= e_centre >= rayon
+        # Pixel entièrement du mauvais côté d'une arête : intersection vide
+        dehors |= e_centre <= -rayon
+
+    aire = np.where(dedans, aire_pixel, 0.0)
+
+    # Pixels traversés par une arête : triangle découpé par le pixel, pour
+    # toutes les paires concernées d'un coup
+    bord = np.flatnonzero(~dedans & ~dehors)
+    aire[bord] = _aires_decoupe_pixels(s[bord], x_g[bord], x_d[bord], y_b[bord], y_h[bord])
+
+    # Paires d'aire négligeable devant le pixel écartées, sauf la plus grande
+    # paire de chaque triangle : un triangle quasi vertical garde son pixel.
+    # Les paires d'un même triangle sont consécutives
+    garde = aire > TOLERANCE_AIRE_PIXEL * aire_pixel
+    if tri.size:
+        debuts = np.flatnonzero(np.diff(tri, prepend=-1))
+        plus_grande = np.repeat(np.maximum.reduceat(aire, debuts), np.diff(np.append(debuts, tri.size)))
+        garde |= (aire == plus_grande) & (aire > 0)
+
+    return ligne[garde], colonne[garde], tri[garde], aire[garde]
+
+
+def _aires_decoupe_pixels(sommets, x_g, x_d, y_b, y_h):
+    """
+    Aire d'intersection de triangles avec des pixels, sans objet géométrique.
+
+    Chaque triangle est découpé (Sutherland-Hodgman) par les quatre demi-plans
+    du pixel associé, puis l'aire du polygone obtenu est calculée par la
+    formule du lacet. Toutes les paires sont traitées ensemble : le polygone
+    de chaque paire est une ligne de deux tableaux (K, n), x et y, dont seuls
+    les nb premiers sommets sont valides (au plus 7 après les quatre découpes).
+
+    Paramètres
+    ----------
+    sommets : np.ndarray
+        Tableau (K, 3, 2) des sommets XY des triangles.
+    x_g, x_d, y_b, y_h : np.ndarray
+        Tableaux (K,) des bords gauche, droit, bas et haut des pixels.
+
+    Retour
+    ------
+    np.ndarray
+        Tableau (K,) float64 des aires d'intersection.
+    """
+    nb_paires = len(sommets)
+    paires = np.arange(nb_paires)
+
+    # Coordonnées relatives au coin bas gauche du pixel : avec des coordonnées
+    # projetées (~1e6 m), la formule du lacet en absolu perdrait la précision
+    x_g = np.asarray(x_g, dtype=np.float64)
+    y_b = np.asarray(y_b, dtype=np.float64)
+    px = sommets[:, :, 0] - x_g[:, None]
+    py = sommets[:, :, 1] - y_b[:, None]
+    largeur = (np.asarray(x_d, dtype=np.float64) - x_g)[:, None]
+    hauteur = (np.asarray(y_h, dtype=np.float64) - y_b)[:, None]
+    nb = np.full(nb_paires, 3, dtype=np.int64)
+
+    for axe, limite, sens in ((0, 0.0, 1.0), (0, largeur, -1.0), (1, 0.0, 1.0), (1, hauteur, -1.0)):
+        n_max = px.shape[1]
+        valide = np.arange(n_max) < nb[:, None]
+        dernier = np.maximum(nb - 1, 0)
+
+        # Coordonnée coupée par la limite (u) et coordonnée interpolée (v)
+        u, v = (px, py) if axe == 0 else (py, px)
+
+        # Arête S -> E : S est le sommet précédent (le dernier pour le premier)
+        d_e = sens * (u - limite)
+        d_s = np.roll(d_e, 1, axis=1)
+        d_s[:, 0] = d_e[paires, dernier]
+        v_s = np.roll(v, 1, axis=1)
+        v_s[:, 0] = v[paires, dernier]
+
+        e_dedans = valide & (d_e >= 0.0)
+        traverse = valide & (e_dedans != (d_s >= 0.0))
+
+        t = np.divide(d_s, d_s - d_e, out=np.zeros_like(d_s), where=traverse)
+
+        # Chaque arête émet au plus deux sommets : l'intersection si elle
+        # traverse la limite (posée exactement sur la limite), puis E s'il est
+        # du bon côté
+        cand_u = np.empty((nb_paires, 2 * n_max))
+        cand_v = np.empty((nb_paires, 2 * n_max))
+        garde = np.empty((nb_paires, 2 * n_max), dtype=bool)
+        cand_u[:, 0::2] = limite
+        cand_u[:, 1::2] = u
+        cand_v[:, 0::2] = v_s + t * (v - v_s)
+        cand_v[:, 1::2] = v
+        garde[:, 0::2] = traverse
+        garde[:, 1::2] = e_dedans
+
+        # Sommets gardés tassés en début de ligne, dans leur ordre
+        nb = np.count_nonzero(garde, axis=1)
+        n_suivant = max(int(nb.max()) if nb_paires else 0, 1)
+        ligne = np.repeat(paires, nb)
+        rang = np.arange(ligne.size) - np.repeat(np.cumsum(nb) - nb, nb)
+        u = np.zeros((nb_paires, n_suivant))
+        v = np.zeros((nb_paires, n_suivant))
+        u[ligne, rang] = cand_u[garde]
+        v[ligne, rang] = cand_v[garde]
+        px, py = (u, v) if axe == 0 else (v, u)
+
+    # Formule du lacet sur les nb premiers sommets de chaque polygone (les
+    # sommets de bourrage sont nuls et ne contribuent pas)
+    dernier = np.maximum(nb - 1, 0)
+    qx = np.roll(px, -1, axis=1)
+    qy = np.roll(py, -1, axis=1)
+    qx[paires, dernier] = px[:, 0]
+    qy[paires, dernier] = py[:, 0]
+
+    aire = 0.5 * np.abs((px * qy - qx * py).sum(axis=1))
+    aire[nb < 3] = 0.0
+
+    return aire
+
+
 def mapping_surface(points, triangles, gt, shape_raster):
     """
     Mapping surface-based (intersection triangle / pixel).
@@ -248,7 +852,8 @@ def mapping_surface(points, triangles, gt, shape_raster):
       (id_triangle, aire_intersection)
 
     C'est plus fidèle qu'un barycentre, mais plus coûteux car on fait beaucoup
-    d'intersections géométriques.
+    d'intersections géométriques. Le calcul est fait par mapping_surface_plat,
+    cette fonction ne fait que regrouper le résultat par pixel.
 
     Paramètres
     ----------
@@ -267,61 +872,83 @@ def mapping_surface(points, triangles, gt, shape_raster):
         Dictionnaire :
         mapping[(ligne, colonne)] = [(id_tri, aire), ...]
     """
-    nb_lignes, nb_colonnes = shape_raster
-    x0, dx, _, y0, _, dy = gt
+    lignes, colonnes, ids_tri, aires = mapping_surface_plat(points, triangles, gt, shape_raster)
 
     mapping = {}
+    for ligne, colonne, id_tri, aire in zip(lignes.tolist(), colonnes.tolist(),
+                                            ids_tri.tolist(), aires.tolist()):
+        mapping.setdefault((ligne, colonne), []).append((id_tri, aire))
 
-    for id_tri, tri in enumerate(triangles):
-        pts = points[tri]
-
-        poly_tri = Polygon([
-            (float(pts[0, 0]), float(pts[0, 1])),
-            (float(pts[1, 0]), float(pts[1, 1])),
-            (float(pts[2, 0]), float(pts[2, 1])),
-        ])
-
-        if poly_tri.is_empty or poly_tri.area <= 0:
-            continue
-
-        minx, miny, maxx, maxy = poly_tri.bounds
-
-        col_min = int(np.floor((minx - x0) / dx))
-        col_max = int(np.floor((maxx - x0) / dx))
+    return mapping
 
-        lig_min = int(np.floor((maxy - y0) / dy))
-        lig_max = int(np.floor((miny - y0) / dy))
 
-        col_min = max(col_min, 0)
-        lig_min = max(lig_min, 0)
-        col_max = min(col_max, nb_colonnes - 1)
-        lig_max = min(lig_max, nb_lignes - 1)
+def aplatir_mapping_surface(mapping_surface):
+    """
+    Convertit un mapping surface-based en tableaux à plat.
 
-        for ligne in range(lig_min, lig_max + 1):
-            for colonne in range(col_min, col_max + 1):
+    Opération inverse du regroupement fait par mapping_surface : chaque couple
+    (pixel, triangle) devient une entrée des quatre tableaux, dans l'ordre de
+    parcours du dictionnaire.
 
-                px_min = x0 + colonne * dx
-                px_max = x0 + (colonne + 1) * dx
+    Paramètres
+    ----------
+    mapping_surface : dict
+        Dictionnaire pixel -> liste (id_triangle, aire_intersection).
 
-                py_max = y0 + ligne * dy
-                py_min = y0 + (ligne + 1) * dy
+    Retour
+    ------
+    tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        lignes, colonnes, ids_tri (int64) et aires (float64), de même longueur.
+    """
+    # Itérateurs chaînés lus directement par np.fromiter, sans liste python
+    pixels = np.fromiter(chain.from_iterable(mapping_surface.keys()), dtype=np.int64,
+                         count=2 * len(mapping_surface)).reshape(-1, 2)
+    nb_par_pixel = np.fromiter(map(len, mapping_surface.values()), dtype=np.int64,
+                               count=len(mapping_surface))
+    couples = np.fromiter(chain.from_iterable(chain.from_iterable(mapping_surface.values())),
+                          dtype=np.float64, count=2 * int(nb_par_pixel.sum())).reshape(-1, 2)
+
+    return (
+        np.repeat(pixels[:, 0], nb_par_pixel),
+        np.repeat(pixels[:, 1], nb_par_pixel),
+        couples[:, 0].astype(np.int64),
+        couples[:, 1],
+    )
+
+
+def mapping_par_triangle(lignes, colonnes, ids_tri, aires, nb_triangles):
+    """
+    Regroupe un mapping à plat par triangle, sous forme de tableaux contigus.
 
-                poly_pixel = box(float(px_min), float(py_min), float(px_max), float(py_max))
+    Les entrées du triangle t sont les tranches [debuts[t]:debuts[t + 1]] des
+    tableaux renvoyés (format CSR). Aucune liste ni tuple python n'est créé.
 
-                inter = poly_tri.intersection(poly_pixel)
-                if inter.is_empty:
-                    continue
+    Paramètres
+    ----------
+    lignes, colonnes, ids_tri, aires : np.ndarray
+        Mapping pixel triangle à plat (voir mapping_surface_plat).
+    nb_triangles : int
+        Nombre total de triangles. Des indices plus grands sont acceptés et
+        allongent debuts en conséquence.
 
-                aire = float(inter.area)
-                if aire <= 0:
-                    continue
+    Retour
+    ------
+    tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        debuts : int64, forme (nb_triangles + 1,)
+        lignes, colonnes, aires : entrées triées par triangle. Le tri est
+        stable : l'ordre d'origine est conservé pour un même triangle.
+    """
+    ids_tri = np.asarray(ids_tri)
+    ordre = np.argsort(ids_tri, kind="stable")
 
-                mapping.setdefault((ligne, colonne), []).append((int(id_tri), aire))
+    comptes = np.bincount(ids_tri, minlength=int(nb_triangles))
+    debuts = np.zeros(comptes.size + 1, dtype=np.int64)
+    np.cumsum(comptes, out=debuts[1:])
 
-    return mapping
+    return debuts, np.asarray(lignes)[ordre], np.asarray(colonnes)[ordre], np.asarray(aires)[ordre]
 
 
-def projette_triangles_surface(valeurs, mapping_surface, shape_raster, fill=np.nan):
+def projette_triangles_surface(valeurs, mapping_surface, shape_raster, fill=np.nan, dtype=np.float32):
     """
     Projection triangles -> raster en utilisant un mapping surface-based.
 
@@ -334,37 +961,48 @@ def projette_triangles_surface(valeurs, mapping_surface, shape_raster, fill=np.n
     ----------
     valeurs : array_like
         Tableau (n_tri,) contenant une valeur par triangle.
-    mapping_surface : dict
-        Dictionnaire pixel -> liste (id_triangle, aire_intersection).
+    mapping_surface : dict or tuple
+        Dictionnaire pixel -> liste (id_triangle, aire_intersection), ou sa
+        forme à plat (lignes, colonnes, ids_tri, aires) renvoyée par
+        mapping_surface_plat (aucun dictionnaire n'est alors construit).
     shape_raster : tuple
         Forme du raster (nb_lignes, nb_colonnes).
     fill : float
         Valeur par défaut pour initialiser le raster.
+    dtype : type numpy
+        Type du tableau de sortie (float32 par défaut : les valeurs MH y
+        tiennent sans perte utile, les calculs intermédiaires restent en
+        float64).
 
     Retour
     ------
     np.ndarray
-        Raster 2D en float.
+        Raster 2D de type dtype.
     """
     nb_lignes, nb_colonnes = shape_raster
-    raster = np.full((nb_lignes, nb_colonnes), fill, dtype=float)
+    nb_pixels = nb_lignes * nb_colonnes
 
     valeurs = np.asarray(valeurs, dtype=float)
 
-    for (ligne, colonne), liste in mapping_surface.items():
-        num = 0.0
-        den = 0.0
-
-        for id_tri, aire in liste:
-            v = valeurs[int(id_tri)]
-            if np.isnan(v):
-                continue
-            a = float(aire)
-            num += float(v) * a
-            den += a
-
-        if den > 0:
-            raster[ligne, colonne] = num / den
-
-    return raster
+    # Numérateur et dénominateur de chaque pixel en une passe np.bincount,
+    # les triangles sans valeur (NaN) étant ignorés
+    if isinstance(mapping_surface, dict):
+        lignes, colonnes, ids_tri, aires = aplatir_mapping_surface(mapping_surface)
+    else:
+        lignes, colonnes, ids_tri, aires = mapping_surface
+        lignes = np.asarray(lignes, dtype=np.int64)
+        colonnes = np.asarray(colonnes, dtype=np.int64)
+        aires = np.asarray(aires, dtype=np.float64)
+    v = valeurs[ids_tri]
+    garde = ~np.isnan(v)
+
+    pixel = lignes[garde] * nb_colonnes + colonnes[garde]
+    aires = aires[garde]
+    num = np.bincount(pixel, weights=v[garde] * aires, minlength=nb_pixels)
+    den = np.bincount(pixel, weights=aires, minlength=nb_pixels)
+
+    raster = np.full(nb_pixels, fill, dtype=dtype)
+    np.divide(num, den, out=raster, where=den > 0)
+
+    return raster.reshape((nb_lignes, nb_colonnes))
 
@@ -11,9 +11,14 @@ Contenu
    - filtre_sigma : filtre simple de valeurs aberrantes (k-sigma)
 
 2) Filtrage géométrique sur un maillage triangulé (MED)
+   - barycentres_triangles : barycentres des triangles, calculés une fois et
+     partagés entre les filtres et le mapping barycentre
    - filtre_z : garde les triangles dont le barycentre respecte une contrainte en Z
    - filtre_interieur : garde les triangles dont le barycentre est dans une zone intérieure XY
 
+3) Préparation de l'affichage
+   - faces_pyvista : tableau "faces" PyVista d'un ensemble de triangles
+
 Remarques importantes
 ---------------------
 - Les fonctions de filtrage triangles travaillent à partir du barycentre des triangles.
@@ -83,19 +88,53 @@ def filtre_sigma(data, k=3.0):
         return d.copy(), (np.nan, np.nan, np.nan, np.nan)
 
     moyenne = float(np.mean(valid))
-    std = float(np.std(valid))
+
+    # Écart-type en deux passes sur la copie des valeurs valides, centrée sur
+    # place : pas de tableau temporaire comme dans np.std, et pas de perte de
+    # précision comme avec E[x²] - E[x]² sur des altitudes (moyenne >> écart)
+    valid -= moyenne
+    std = float(np.sqrt(np.dot(valid, valid) / valid.size))
 
     borne_basse = moyenne - float(k) * std
     borne_haute = moyenne + float(k) * std
 
     out = d.copy()
-    masque_outliers = (out < borne_basse) | (out > borne_haute)
+    masque_outliers = (d < borne_basse) | (d > borne_haute)
     out[masque_outliers] = np.nan
 
     return out, (moyenne, std, borne_basse, borne_haute)
 
 
-def filtre_z(points, triangles, z_min=None, z_max=None, mask=False):
+def barycentres_triangles(points, triangles):
+    """
+    Barycentres des triangles d'un maillage.
+
+    Les trois sommets sont additionnés colonne par colonne : pas de tableau
+    intermédiaire (M, 3, 3) comme avec points[triangles].mean(axis=1).
+
+    Paramètres
+    ----------
+    points : np.ndarray
+        Coordonnées des points, tableau (N, D) (D = 2 ou 3).
+    triangles : np.ndarray
+        Indices des triangles, tableau (M, 3).
+
+    Retour
+    ------
+    np.ndarray
+        Tableau (M, D) float des barycentres.
+    """
+    pts = np.asarray(points, dtype=float)
+    tri = np.asarray(triangles).reshape(-1, 3)
+
+    bary = pts[tri[:, 0]] + pts[tri[:, 1]]
+    bary += pts[tri[:, 2]]
+    bary /= 3.0
+
+    return bary
+
+
+def filtre_z(points, triangles, z_min=None, z_max=None, mask=False, bary=None):
     """
     Filtre des triangles selon l'altitude Z de leur barycentre.
 
@@ -114,6 +153,9 @@ def filtre_z(points, triangles, z_min=None, z_max=None, mask=False):
         Si défini, on conserve uniquement les triangles dont le barycentre vérifie z <= z_max.
     mask : bool
         Si True, retourne aussi le masque booléen des triangles conservés.
+    bary : np.ndarray ou None
+        Barycentres (M, 3) déjà calculés (voir barycentres_triangles). Si None,
+        ils sont calculés ici.
 
     Retour
     ------
@@ -121,14 +163,14 @@ def filtre_z(points, triangles, z_min=None, z_max=None, mask=False):
         triangles_filtrés
         ou (triangles_filtrés, masque)
     """
-    pts = np.asarray(points)
     tri = np.asarray(triangles)
 
     if tri.size == 0:
         masque = np.zeros((0,), dtype=bool)
         return (tri, masque) if mask else tri
 
-    bary = pts[tri].mean(axis=1)
+    if bary is None:
+        bary = barycentres_triangles(points, tri)
     z = bary[:, 2]
 
     keep = np.ones((tri.shape[0],), dtype=bool)
@@ -145,7 +187,7 @@ def filtre_z(points, triangles, z_min=None, z_max=None, mask=False):
     return tri[keep]
 
 
-def filtre_interieur(points, triangles, marge=0.1, mask=False):
+def filtre_interieur(points, triangles, marge=0.1, mask=False, bary=None):
     """
     Filtre des triangles dont le barycentre est à l'intérieur d'une zone XY.
 
@@ -167,6 +209,9 @@ def filtre_interieur(points, triangles, marge=0.1, mask=False):
         Marge relative (0 à 0.49 recommandé). Si 0, aucun filtrage intérieur.
     mask : bool
         Si True, retourne aussi le masque booléen des triangles conservés.
+    bary : np.ndarray ou None
+        Barycentres (M, 2 ou 3) déjà calculés (voir barycentres_triangles).
+        Si None, ils sont calculés ici.
 
     Retour
     ------
@@ -174,7 +219,6 @@ def filtre_interieur(points, triangles, marge=0.1, mask=False):
         triangles_filtrés
         ou (triangles_filtrés, masque)
     """
-    pts = np.asarray(points)
     tri = np.asarray(triangles)
 
     if tri.size == 0:
@@ -187,7 +231,8 @@ def filtre_interieur(points, triangles, marge=0.1, mask=False):
     if marge >= 0.5:
         marge = 0.49
 
-    bary = pts[tri].mean(axis=1)
+    if bary is None:
+        bary = barycentres_triangles(points, tri)
     x = bary[:, 0]
     y = bary[:, 1]
 
@@ -215,3 +260,29 @@ def filtre_interieur(points, triangles, marge=0.1, mask=False):
 
     return tri[keep]
 
+
+def faces_pyvista(triangles):
+    """
+    Construit le tableau "faces" attendu par pyvista.PolyData.
+
+    PyVista attend un tableau à plat [3, i0, i1, i2, 3, j0, j1, j2, ...]. Il est
+    rempli directement dans un seul tableau (M, 4), sans colonne temporaire ni
+    empilement.
+
+    Paramètres
+    ----------
+    triangles : np.ndarray
+        Tableau (M, 3) des indices de sommets.
+
+    Retour
+    ------
+    np.ndarray
+        Tableau 1D (4 * M,) de type int64.
+    """
+    triangles = np.asarray(triangles)
+
+    faces = np.empty((len(triangles), 4), dtype=np.int64)
+    faces[:, 0] = 3
+    faces[:, 1:] = triangles
+
+    return faces.ravel()
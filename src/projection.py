@@ -36,12 +36,16 @@ Conventions
 - Si nodata est fourni, les valeurs égales à nodata sont ignorées.
 - Les NaN sont ignorés.
 - Si aucune valeur valide ne peut être obtenue, on retourne fill.
+- Les valeurs renvoyées sont en float32 par défaut (paramètre dtype). Les
+  coordonnées, indices et poids d'interpolation restent calculés en float64 :
+  en float32, des coordonnées projetées (~1e6 m) perdraient plusieurs
+  centimètres.
 """
 
 import numpy as np
 
 
-def mh_vers_triangles(raster, tri_pixel, nodata=None, fill=np.nan):
+def mh_vers_triangles(raster, tri_pixel, nodata=None, fill=np.nan, dtype=np.float32):
     """
     Projection MH vers triangles avec une association directe pixel triangle.
 
@@ -64,6 +68,8 @@ def mh_vers_triangles(raster, tri_pixel, nodata=None, fill=np.nan):
         Valeur nodata à ignorer si elle est présente dans le raster.
     fill : float
         Valeur renvoyée si un triangle ne peut pas recevoir de valeur.
+    dtype : type numpy
+        Type du tableau de sortie.
 
     Retour
     ------
@@ -73,7 +79,7 @@ def mh_vers_triangles(raster, tri_pixel, nodata=None, fill=np.nan):
     nb_triangles = tri_pixel.shape[0]
     nb_lignes, nb_colonnes = raster.shape
 
-    valeurs_triangles = np.full(nb_triangles, fill, dtype=float)
+    valeurs_triangles = np.full(nb_triangles, fill, dtype=dtype)
 
     for id_triangle, (lig, col) in enumerate(tri_pixel):
         if lig < 0 or col < 0:
@@ -94,7 +100,7 @@ def mh_vers_triangles(raster, tri_pixel, nodata=None, fill=np.nan):
     return valeurs_triangles
 
 
-def mh_vers_tri_bilineaire(raster, xy_tri, gt, nodata=None, fill=np.nan):
+def mh_vers_tri_bilineaire(raster, xy_tri, gt, nodata=None, fill=np.nan, dtype=np.float32):
     """
     Projection MH vers triangles par interpolation bilinéaire.
 
@@ -119,29 +125,29 @@ def mh_vers_tri_bilineaire(raster, xy_tri, gt, nodata=None, fill=np.nan):
     fill : float
         Valeur de retour si hors raster ou si des valeurs nodata ou NaN
         empêchent l interpolation.
+    dtype : type numpy
+        Type du tableau de sortie.
 
     Retour
     ------
     np.ndarray
         Tableau 1D (nb_triangles,) contenant une valeur par triangle.
     """
-    nb_triangles = xy_tri.shape[0]
-    valeurs_triangles = np.full(nb_triangles, fill, dtype=float)
-
-    for id_triangle, (x, y) in enumerate(xy_tri):
-        valeurs_triangles[id_triangle] = _echant_bilineaire(
-            raster=raster,
-            x=x,
-            y=y,
-            gt=gt,
-            nodata=nodata,
-            fill=fill
-        )
-
-    return valeurs_triangles
+    xy_tri = np.asarray(xy_tri, dtype=float)
+
+    # Tous les triangles échantillonnés en une seule passe numpy
+    return _echant_bilineaire(
+        raster=raster,
+        x=xy_tri[:, 0],
+        y=xy_tri[:, 1],
+        gt=gt,
+        nodata=nodata,
+        fill=fill,
+        dtype=dtype
+    )
 
 
-def _echant_bilineaire(raster, x, y, gt, nodata=None, fill=np.nan):
+def _echant_bilineaire(raster, x, y, gt, nodata=None, fill=np.nan, dtype=float):
     """
     Échantillonne un raster en coordonnées monde (x, y) avec interpolation bilinéaire.
 
@@ -151,56 +157,71 @@ def _echant_bilineaire(raster, x, y, gt, nodata=None, fill=np.nan):
     2) Récupération des 4 voisins (r0,c0) (r0,c1) (r1,c0) (r1,c1)
     3) Interpolation bilinéaire si les 4 valeurs sont valides
 
+    x et y peuvent être des scalaires ou des tableaux de même forme : tous
+    les points sont alors traités ensemble, sans boucle Python.
+
     Paramètres
     ----------
     raster : np.ndarray
         Raster 2D.
-    x : float
-        Coordonnée monde X.
-    y : float
-        Coordonnée monde Y.
+    x : float ou np.ndarray
+        Coordonnée(s) monde X.
+    y : float ou np.ndarray
+        Coordonnée(s) monde Y.
     gt : tuple
         Geotransform GDAL.
     nodata : float ou None
         Valeur nodata à ignorer.
     fill : float
         Valeur retournée si hors raster ou si interpolation impossible.
+    dtype : type numpy
+        Type du tableau renvoyé (tableaux seulement).
 
     Retour
     ------
-    float
-        Valeur interpolée ou fill.
+    float ou np.ndarray
+        Valeur(s) interpolée(s) ou fill, de la forme de x.
     """
     x0, dx, _, y0, _, dy = gt
     nb_lignes, nb_colonnes = raster.shape
 
-    col_f = (x - x0) / dx
+    scalaire = np.ndim(x) == 0 and np.ndim(y) == 0
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    forme = np.broadcast_shapes(x.shape, y.shape)
+
+    col_f = np.broadcast_to((x - x0) / dx, forme).ravel()
 
     # dy est souvent négatif, donc la division fonctionne tant que dy est non nul
-    row_f = (y - y0) / dy
+    row_f = np.broadcast_to((y - y0) / dy, forme).ravel()
 
-    c0 = int(np.floor(col_f))
-    r0 = int(np.floor(row_f))
-    c1 = c0 + 1
-    r1 = r0 + 1
+    out = np.full(col_f.size, fill, dtype=dtype)
 
-    if r0 < 0 or c0 < 0 or r1 >= nb_lignes or c1 >= nb_colonnes:
-        return fill
+    # Points dont les 4 voisins sont dans le raster (coordonnées non finies
+    # écartées avant la conversion entière)
+    with np.errstate(invalid="ignore"):
+        c0 = np.floor(col_f)
+        r0 = np.floor(row_f)
+        dans = (r0 >= 0) & (c0 >= 0) & (r0 + 1 < nb_lignes) & (c0 + 1 < nb_colonnes)
 
-    poids_col = col_f - c0
-    poids_lig = row_f - r0
+    idx = np.flatnonzero(dans)
+    c0 = c0[idx].astype(np.int64)
+    r0 = r0[idx].astype(np.int64)
+    c1 = c0 + 1
+    r1 = r0 + 1
 
-    v00 = float(raster[r0, c0])
-    v01 = float(raster[r0, c1])
-    v10 = float(raster[r1, c0])
-    v11 = float(raster[r1, c1])
+    poids_col = col_f[idx] - c0
+    poids_lig = row_f[idx] - r0
 
-    vals = np.array([v00, v01, v10, v11], dtype=float)
+    v00 = raster[r0, c0].astype(float)
+    v01 = raster[r0, c1].astype(float)
+    v10 = raster[r1, c0].astype(float)
+    v11 = raster[r1, c1].astype(float)
 
-    if nodata is not None and np.any(vals == float(nodata)):
-        return fill
-    if np.any(np.isnan(vals)):
-        return fill
+    invalide = np.isnan(v00) | np.isnan(v01) | np.isnan(v10) | np.isnan(v11)
+    if nodata is not None:
+        nd = float(nodata)
+        invalide |= (v00 == nd) | (v01 == nd) | (v10 == nd) | (v11 == nd)
 
     val = (
         v00 * (1.0 - poids_col) * (1.0 - poids_lig)
@@ -209,10 +230,16 @@ def _echant_bilineaire(raster, x, y, gt, nodata=None, fill=np.nan):
         + v11 * poids_col * poids_lig
     )
 
-    return float(val)
+    ok = ~invalide
+    out[idx[ok]] = val[ok]
+
+    if scalaire:
+        return float(out[0])
+    return out.reshape(forme)
 
 
-def mh_vers_tri_multisample(raster, points, triangles, gt, nodata=None, fill=np.nan, plan="7pt"):
+def mh_vers_tri_multisample(raster, points, triangles, gt, nodata=None, fill=np.nan, plan="7pt",
+                            dtype=np.float32):
     """
     Projection MH vers triangles par multi échantillonnage.
 
@@ -245,15 +272,14 @@ def mh_vers_tri_multisample(raster, points, triangles, gt, nodata=None, fill=np.
         Stratégie d échantillonnage :
         - "4pt" : barycentre et 3 points proches des sommets
         - "7pt" : "4pt" plus 3 milieux d arêtes
+    dtype : type numpy
+        Type du tableau de sortie.
 
     Retour
     ------
     np.ndarray
         Tableau 1D (M,) contenant une valeur par triangle.
     """
-    nb_triangles = len(triangles)
-    valeurs_triangles = np.full(nb_triangles, fill, dtype=float)
-
     if plan == "4pt":
         poids = [
             (1.0 / 3.0, 1.0 / 3.0, 1.0 / 3.0),
@@ -274,31 +300,34 @@ def mh_vers_tri_multisample(raster, points, triangles, gt, nodata=None, fill=np.
     else:
         raise ValueError("Plan non reconnu")
 
-    for id_triangle, tri in enumerate(triangles):
-        ia, ib, ic = tri
-
-        a = points[ia, :2]
-        b = points[ib, :2]
-        c = points[ic, :2]
-
-        echantillons = []
-        for wa, wb, wc in poids:
-            p = wa * a + wb * b + wc * c
-            val = _echant_bilineaire(
-                raster=raster,
-                x=float(p[0]),
-                y=float(p[1]),
-                gt=gt,
-                nodata=nodata,
-                fill=np.nan
-            )
-            echantillons.append(val)
+    poids = np.asarray(poids, dtype=float)
+    points = np.asarray(points, dtype=float)
+    triangles = np.asarray(triangles).reshape(-1, 3)
+
+    a = points[triangles[:, 0], :2]
+    b = points[triangles[:, 1], :2]
+    c = points[triangles[:, 2], :2]
+
+    # Points d'échantillonnage (M, K) de tous les triangles, puis un seul
+    # échantillonnage bilinéaire pour l'ensemble
+    x = poids[:, 0] * a[:, 0, None] + poids[:, 1] * b[:, 0, None] + poids[:, 2] * c[:, 0, None]
+    y = poids[:, 0] * a[:, 1, None] + poids[:, 1] * b[:, 1, None] + poids[:, 2] * c[:, 1, None]
+
+    echantillons = _echant_bilineaire(
+        raster=raster,
+        x=x,
+        y=y,
+        gt=gt,
+        nodata=nodata,
+        fill=np.nan
+    )
 
-        echantillons = np.asarray(echantillons, dtype=float)
-        valides = echantillons[np.isfinite(echantillons)]
+    # Moyenne des échantillons valides de chaque triangle
+    valides = np.isfinite(echantillons)
+    nb_valides = valides.sum(axis=1)
+    somme = np.where(valides, echantillons, 0.0).sum(axis=1)
 
-        if valides.size > 0:
-            valeurs_triangles[id_triangle] = float(np.mean(valides))
+    valeurs_triangles = np.full(len(triangles), fill, dtype=dtype)
+    np.divide(somme, nb_valides, out=valeurs_triangles, where=nb_valides > 0)
 
     return valeurs_triangles
-
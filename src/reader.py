@@ -13,10 +13,14 @@ Ce module ne contient aucune logique de conversion MH vers SM.
 """
 
 import os
+from functools import lru_cache
+
 import numpy as np
 import meshio
 from osgeo import gdal
 
+from .io_mh_sm_exchange import cle_fichier
+
 
 def lit_raster(chemin):
     """
@@ -36,9 +40,7 @@ def lit_raster(chemin):
     nodata : float ou None
         Valeur nodata du raster.
     """
-    ds = gdal.Open(chemin)
-    if ds is None:
-        raise FileNotFoundError("Raster introuvable " + str(chemin))
+    ds = _ouvre_raster(chemin)
 
     band = ds.GetRasterBand(1)
     arr = band.ReadAsArray()
@@ -48,6 +50,27 @@ def lit_raster(chemin):
     return arr, gt, nodata
 
 
+def _ouvre_raster(chemin):
+    """
+    Ouvre un raster avec GDAL sans lire les pixels.
+
+    Paramètres
+    ----------
+    chemin : str
+        Chemin du raster.
+
+    Retour
+    ------
+    gdal.Dataset
+        Jeu de données GDAL ouvert en lecture.
+    """
+    ds = gdal.Open(chemin)
+    if ds is None:
+        raise FileNotFoundError("Raster introuvable " + str(chemin))
+
+    return ds
+
+
 def resume_raster(chemin):
     """
     Affiche un résumé simple d un raster.
@@ -57,8 +80,11 @@ def resume_raster(chemin):
     chemin : str
         Chemin du raster.
     """
-    arr, gt, nodata = lit_raster(chemin)
-    nrows, ncols = arr.shape
+    # Seules les métadonnées sont affichées : les pixels ne sont pas lus
+    ds = _ouvre_raster(chemin)
+    nrows, ncols = ds.RasterYSize, ds.RasterXSize
+    gt = ds.GetGeoTransform()
+    nodata = ds.GetRasterBand(1).GetNoDataValue()
 
     print("Raster")
     print("chemin", chemin)
@@ -161,6 +187,53 @@ def lit_med_champs(chemin):
     return points, triangles, champs_tri, champs_pts
 
 
+@lru_cache(maxsize=2)
+def _med_cache(cle_med):
+    """
+    Lit (ou récupère) un fichier MED avec ses champs.
+
+    Paramètres
+    ----------
+    cle_med : tuple
+        Clé du fichier, voir cle_fichier.
+
+    Retour
+    ------
+    tuple
+        points, triangles, champs_tri, champs_pts (comme lit_med_champs).
+        Les tableaux sont en lecture seule car partagés.
+    """
+    points, triangles, champs_tri, champs_pts = lit_med_champs(cle_med[0])
+
+    for arr in [points, triangles, *champs_tri.values(), *champs_pts.values()]:
+        arr.setflags(write=False)
+
+    return points, triangles, champs_tri, champs_pts
+
+
+def lit_med_champs_cache(chemin):
+    """
+    Lit un fichier MED en passant par le cache du module.
+
+    La lecture meshio d'un MED est coûteuse : un même fichier visualisé ou
+    prévisualisé plusieurs fois n'est relu que s'il change sur disque.
+
+    Paramètres
+    ----------
+    chemin : str
+        Chemin du fichier MED.
+
+    Retour
+    ------
+    tuple
+        points (lecture seule), triangles (lecture seule), champs_tri,
+        champs_pts. Les dictionnaires sont des copies, leurs tableaux sont
+        en lecture seule.
+    """
+    points, triangles, champs_tri, champs_pts = _med_cache(cle_fichier(chemin))
+    return points, triangles, dict(champs_tri), dict(champs_pts)
+
+
 def resume_med(chemin):
     """
     Affiche un résumé simple d un fichier MED.
@@ -170,7 +243,7 @@ def resume_med(chemin):
     chemin : str
         Chemin du fichier MED.
     """
-    points, triangles, champs_tri, champs_pts = lit_med_champs(chemin)
+    points, triangles, champs_tri, champs_pts = lit_med_champs_cache(chemin)
 
     print("MED")
     print("chemin", chemin)
@@ -23,9 +23,16 @@ et la cohérence globale des fichiers cir et val afin de ne pas lancer de pipeli
 """
 
 import re
+from io import StringIO
+from itertools import chain
+
 import numpy as np
 
 
+# Ligne de facette "fX N" (espaces en début de ligne tolérés, comme après strip)
+_RE_FACETTE_CIR = re.compile(rb"^[^\S\n]*f\d+[^\S\n]+(\d+)", re.M)
+
+
 def lire_tailles_cir(chemin_cir):
     """
     Lit uniquement le découpage en facettes du fichier scene_triangle.cir.
@@ -46,19 +53,11 @@ def lire_tailles_cir(chemin_cir):
         Liste des tailles de facettes, dans l'ordre de lecture.
         Chaque élément correspond au nombre de triangles de la facette.
     """
-    tailles = []
-
-    with open(chemin_cir, "r", errors="ignore") as fichier:
-        for ligne in fichier:
-            texte = ligne.strip()
-            if not texte:
-                continue
+    with open(chemin_cir, "rb") as fichier:
+        contenu = fichier.read()
 
-            match = re.match(r"^f(\d+)\s+(\d+)", texte)
-            if match:
-                tailles.append(int(match.group(2)))
-
-    return tailles
+    # Une seule passe de l'expression régulière sur tout le fichier
+    return [int(m.group(1)) for m in _RE_FACETTE_CIR.finditer(contenu)]
 
 
 def lire_val(chemin_val):
@@ -85,41 +84,39 @@ def lire_val(chemin_val):
         valeurs : tableau numpy des valeurs par triangle
     """
     tailles_facettes = []
-    valeurs = []
+    blocs = []
 
     with open(chemin_val, "r", errors="ignore") as fichier:
-        lignes = [l.strip() for l in fichier if l.strip()]
+        lignes = [l for l in map(str.strip, fichier) if l]
 
     if len(lignes) == 0:
         return [], np.asarray([], dtype=float)
 
+    # On ne parcourt en Python que les lignes de facette : chaque bloc de
+    # valeurs est repéré par sa tranche de lignes, puis toutes les valeurs
+    # sont converties en une seule fois par np.loadtxt (première colonne)
     index = 1
-    while index < len(lignes):
-        texte = lignes[index]
-
-        if texte.startswith("f"):
-            morceaux = texte.split()
-            if len(morceaux) < 2:
-                index += 1
-                continue
+    for index_f in [i for i, l in enumerate(lignes) if l.startswith("f")]:
+        if index_f < index:
+            continue
 
-            nb = int(morceaux[1])
-            tailles_facettes.append(nb)
-            index += 1
+        morceaux = lignes[index_f].split()
+        if len(morceaux) < 2:
+            index = index_f + 1
+            continue
 
-            for _ in range(nb):
-                if index >= len(lignes):
-                    break
+        nb = int(morceaux[1])
+        tailles_facettes.append(nb)
+        index = index_f + 1 + max(nb, 0)
+        blocs.append(lignes[index_f + 1:index])
 
-                val_txt = lignes[index].replace("\t", " ").split()
-                if len(val_txt) > 0:
-                    valeurs.append(float(val_txt[0]))
+    texte = "\n".join(chain.from_iterable(blocs))
+    if not texte:
+        return tailles_facettes, np.asarray([], dtype=float)
 
-                index += 1
-        else:
-            index += 1
+    valeurs = np.loadtxt(StringIO(texte), dtype=float, usecols=0, ndmin=1, comments=None)
 
-    return tailles_facettes, np.asarray(valeurs, dtype=float)
+    return tailles_facettes, valeurs
 
 
 def stats_valeurs(valeurs):
@@ -153,7 +150,7 @@ def stats_valeurs(valeurs):
     vmin = float(np.min(valeurs))
     vmax = float(np.max(valeurs))
     moy = float(np.mean(valeurs))
-    pct_zeros = float(np.mean(valeurs == 0.0) * 100.0)
+    pct_zeros = float(100.0 * np.count_nonzero(valeurs == 0.0) / n)
 
     return {
         "n": n,
@@ -193,6 +190,9 @@ def verifier_cir_val(chemin_cir, chemin_val, afficher=True):
         nb_facettes_val : int
         nb_triangles_cir : int
         nb_valeurs_val : int
+        premiere_facette_differente : int ou None
+            Indice (à partir de 0) de la première facette dont la taille
+            diffère entre .cir et .val, None si le découpage est identique.
         stats : dict
     """
     tailles_cir = lire_tailles_cir(chemin_cir)
@@ -203,9 +203,19 @@ def verifier_cir_val(chemin_cir, chemin_val, afficher=True):
     nb_triangles_cir = int(sum(tailles_cir))
     nb_valeurs_val = int(valeurs.size)
 
+    # Comparaison de listes d'entiers : déjà une boucle C, plus rapide qu'une
+    # conversion en tableaux numpy
     ok_facettes = (tailles_cir == tailles_val)
     ok_nb_valeurs = (nb_triangles_cir == nb_valeurs_val)
 
+    # Diagnostic : première facette différente (ou facette manquante d'un côté)
+    premiere_facette_differente = None
+    if not ok_facettes:
+        premiere_facette_differente = next(
+            (i for i, (a, b) in enumerate(zip(tailles_cir, tailles_val)) if a != b),
+            min(nb_facettes_cir, nb_facettes_val)
+        )
+
     stats = stats_valeurs(valeurs)
 
     if afficher:
@@ -215,7 +225,7 @@ def verifier_cir_val(chemin_cir, chemin_val, afficher=True):
         if ok_facettes:
             print("Découpage facettes identique")
         else:
-            print("Découpage facettes différent")
+            print("Découpage facettes différent à partir de la facette", premiere_facette_differente)
 
         if ok_nb_valeurs:
             print("Nombre de valeurs cohérent")
@@ -234,6 +244,7 @@ def verifier_cir_val(chemin_cir, chemin_val, afficher=True):
         "nb_facettes_val": nb_facettes_val,
         "nb_triangles_cir": nb_triangles_cir,
         "nb_valeurs_val": nb_valeurs_val,
+        "premiere_facette_differente": premiere_facette_differente,
         "stats": stats,
     }
 
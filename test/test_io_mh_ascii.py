@@ -0,0 +1,79 @@
+# coding=utf-8
+"""Tests de lecture des rasters MH au format ESRI ASCII grid.
+
+Tests numpy uniquement : aucune dépendance QGIS.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'bastien.dorepr0@gmail.com'
+__date__ = '2026-01-08'
+__copyright__ = 'Copyright 2026, Bastien Doré'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.io_mh_sm_exchange import lire_mh_ascii
+
+ENTETE_5_CLES = (
+    "ncols 4\n"
+    "nrows 2\n"
+    "xllcorner 100.0\n"
+    "yllcorner 200.0\n"
+    "cellsize 2.0\n"
+)
+ENTETE_6_CLES = ENTETE_5_CLES + "NODATA_value -9999\n"
+
+
+class LireMhAsciiTest(unittest.TestCase):
+    """Lecture de petits rasters ASCII grid écrits à la main."""
+
+    def setUp(self):
+        self.dossier = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dossier)
+
+    def lire(self, contenu):
+        chemin = os.path.join(self.dossier, "raster.asc")
+        with open(chemin, "w") as f:
+            f.write(contenu)
+        return lire_mh_ascii(chemin)
+
+    def test_une_ligne_par_rangee(self):
+        """Un raster standard est lu avec sa géoréférence et ses NODATA."""
+        ras, gt, nd = self.lire(ENTETE_6_CLES + "1 2 3 4\n5 -9999 7 8\n")
+        self.assertEqual(ras.shape, (2, 4))
+        self.assertEqual(gt, (100.0, 2.0, 0.0, 204.0, 0.0, -2.0))
+        self.assertEqual(nd, -9999.0)
+        self.assertTrue(np.isnan(ras[1, 1]))
+        np.testing.assert_array_equal(ras[0], [1, 2, 3, 4])
+
+    def test_rangees_decoupees_entete_6_cles(self):
+        """Des rangées coupées autrement que ncols sont relues après un en-tête complet."""
+        ras, _, _ = self.lire(ENTETE_6_CLES + "1 2 3\n4 5 6 7 8\n")
+        np.testing.assert_array_equal(ras, [[1, 2, 3, 4], [5, 6, 7, 8]])
+
+    def test_rangees_decoupees_entete_5_cles(self):
+        """Sans NODATA_value, la relecture en flux part aussi de la première valeur."""
+        ras, _, _ = self.lire(ENTETE_5_CLES + "1 2 3\n4 5 6 7 8\n")
+        np.testing.assert_array_equal(ras, [[1, 2, 3, 4], [5, 6, 7, 8]])
+
+    def test_nombre_de_valeurs_incoherent(self):
+        """Un raster incomplet est refusé."""
+        with self.assertRaises(ValueError):
+            self.lire(ENTETE_6_CLES + "1 2 3 4\n5 6 7\n")
+
+
+if __name__ == "__main__":
+    suite = unittest.TestLoader().loadTestsFromTestCase(LireMhAsciiTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,102 @@
+# coding=utf-8
+"""Tests du mapping surface-based (intersections triangle / pixel).
+
+Tests numpy uniquement : aucune dépendance QGIS.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'bastien.dorepr0@gmail.com'
+__date__ = '2026-01-08'
+__copyright__ = 'Copyright 2026, Bastien Doré'
+
+import unittest
+
+import numpy as np
+
+from src.mapping import mapping_surface_plat
+
+# Grille 10 x 10 de pixels de 1 m, coin haut gauche en (0, 10)
+GT = (0.0, 1.0, 0.0, 10.0, 0.0, -1.0)
+FORME = (10, 10)
+
+
+def aires_par_pixel(points_xy, triangles=((0, 1, 2),)):
+    """Mapping surface d'un petit maillage, sous forme {(ligne, colonne, id_tri): aire}."""
+    points = np.zeros((len(points_xy), 3))
+    points[:, :2] = points_xy
+    lignes, colonnes, ids_tri, aires = mapping_surface_plat(points, np.asarray(triangles), GT, FORME)
+    return {
+        (int(l), int(c), int(t)): float(a)
+        for l, c, t, a in zip(lignes, colonnes, ids_tri, aires)
+    }
+
+
+class MappingSurfaceTest(unittest.TestCase):
+    """Aires d'intersection connues entre triangles et pixels."""
+
+    def test_pixel_entier(self):
+        """Un pixel entièrement couvert reçoit l'aire du pixel."""
+        aires = aires_par_pixel([(0.0, 10.0), (4.0, 10.0), (0.0, 6.0)])
+        self.assertAlmostEqual(aires[(0, 0, 0)], 1.0, places=12)
+        self.assertAlmostEqual(aires[(1, 1, 0)], 1.0, places=12)
+        self.assertAlmostEqual(sum(aires.values()), 8.0, places=12)
+
+    def test_demi_pixel(self):
+        """Un triangle rectangle sur la diagonale d'un pixel en couvre la moitié."""
+        aires = aires_par_pixel([(1.0, 9.0), (2.0, 9.0), (1.0, 8.0)])
+        self.assertEqual(list(aires), [(1, 1, 0)])
+        self.assertAlmostEqual(aires[(1, 1, 0)], 0.5, places=12)
+
+    def test_arete_commune_sans_intersection(self):
+        """Un pixel qui ne touche le triangle que par une arête ou un sommet est ignoré."""
+        aires = aires_par_pixel([(3.0, 9.0), (4.0, 9.0), (4.0, 8.0)])
+        self.assertEqual(list(aires), [(1, 3, 0)])
+        self.assertAlmostEqual(aires[(1, 3, 0)], 0.5, places=12)
+
+    def test_somme_egale_aire_triangle(self):
+        """Les aires d'un triangle quelconque se répartissent sans perte entre pixels."""
+        xy = np.array([(0.3, 9.7), (5.2, 8.1), (2.5, 3.4)])
+        aires = aires_par_pixel(xy)
+        ab = xy[1] - xy[0]
+        ac = xy[2] - xy[0]
+        aire_tri = 0.5 * abs(ab[0] * ac[1] - ab[1] * ac[0])
+        self.assertAlmostEqual(sum(aires.values()), aire_tri, places=12)
+        self.assertTrue(all(0.0 < a <= 1.0 for a in aires.values()))
+
+    def test_orientation_sans_effet(self):
+        """Un triangle décrit dans le sens horaire donne les mêmes aires."""
+        xy = [(0.3, 9.7), (5.2, 8.1), (2.5, 3.4)]
+        direct = aires_par_pixel(xy)
+        horaire = aires_par_pixel(xy[::-1])
+        self.assertEqual(set(direct), set(horaire))
+        for cle, aire in direct.items():
+            self.assertAlmostEqual(horaire[cle], aire, places=12)
+
+    def test_triangle_quasi_degenere(self):
+        """Un triangle d'aire négligeable ne garde que sa plus grande intersection."""
+        aires = aires_par_pixel([(1.5, 5.5), (2.8, 5.5 + 1e-12), (1.5, 5.5 + 2e-12)])
+        self.assertEqual(list(aires), [(4, 1, 0)])
+        self.assertGreater(aires[(4, 1, 0)], 0.0)
+
+    def test_triangle_degenere_ignore(self):
+        """Un triangle d'aire nulle n'a aucune intersection."""
+        aires = aires_par_pixel([(1.5, 5.5), (2.5, 5.5), (3.5, 5.5)])
+        self.assertEqual(aires, {})
+
+    def test_deux_triangles_partagent_le_pixel(self):
+        """Deux triangles qui forment un pixel se partagent son aire."""
+        xy = [(6.0, 4.0), (7.0, 4.0), (7.0, 3.0), (6.0, 3.0)]
+        aires = aires_par_pixel(xy, triangles=((0, 1, 2), (0, 2, 3)))
+        self.assertEqual(set(aires), {(6, 6, 0), (6, 6, 1)})
+        self.assertAlmostEqual(aires[(6, 6, 0)] + aires[(6, 6, 1)], 1.0, places=12)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestLoader().loadTestsFromTestCase(MappingSurfaceTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
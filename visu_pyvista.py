@@ -25,8 +25,8 @@ import os
 import numpy as np
 import pyvista as pv
 
-from .src.reader import lit_med_champs
-from .src.preprocessing import filtre_interieur, filtre_z
+from .src.reader import lit_med_champs_cache
+from .src.preprocessing import barycentres_triangles, faces_pyvista, filtre_interieur
 
 
 def visualiser_med_pyvista(chemin_med, marge_interieure=0.10, percentile_z=98):
@@ -65,34 +65,35 @@ def visualiser_med_pyvista(chemin_med, marge_interieure=0.10, percentile_z=98):
 
     print("Lecture du fichier MED", chemin_med)
 
-    points, triangles, champs_tri, champs_pts = lit_med_champs(chemin_med)
+    points, triangles, champs_tri, champs_pts = lit_med_champs_cache(chemin_med)
 
     if triangles is None or len(triangles) == 0:
         print("Aucun triangle trouvé dans le fichier MED")
         return
 
+    # Barycentres calculés une seule fois, partagés par les deux filtres
+    bary = barycentres_triangles(points, triangles)
+
     # Filtre intérieur dans le plan XY
-    tri_interieur, _ = filtre_interieur(
+    tri_interieur, masque_interieur = filtre_interieur(
         points,
         triangles,
         marge=marge_interieure,
-        mask=True
+        mask=True,
+        bary=bary
     )
 
     if tri_interieur is None or len(tri_interieur) == 0:
         print("Aucun triangle après filtre intérieur")
         return
 
-    # Filtre Z sur la base des barycentres des triangles
-    bary = points[tri_interieur].mean(axis=1)
-    z_seuil = float(np.percentile(bary[:, 2], percentile_z))
+    # Filtre Z sur la base des barycentres des triangles (même test que
+    # filtre_z avec z_max) : seuil calculé sur les triangles intérieurs, puis
+    # les deux masques sont combinés et les triangles sélectionnés une seule fois
+    z = bary[:, 2]
+    z_seuil = float(np.percentile(z[masque_interieur], percentile_z))
 
-    tri_filtre, _ = filtre_z(
-        points,
-        tri_interieur,
-        z_max=z_seuil,
-        mask=True
-    )
+    tri_filtre = triangles[masque_interieur & (z <= z_seuil)]
 
     print("Nombre de triangles initial", int(triangles.shape[0]))
     print("Nombre de triangles après filtre intérieur", int(tri_interieur.shape[0]))
@@ -104,12 +105,11 @@ def visualiser_med_pyvista(chemin_med, marge_interieure=0.10, percentile_z=98):
 
     # PyVista attend un tableau "faces" au format :
     # [3, i0, i1, i2, 3, j0, j1, j2, ...]
-    faces = np.hstack([
-        np.full((len(tri_filtre), 1), 3, dtype=np.int64),
-        tri_filtre.astype(np.int64)
-    ]).ravel()
+    faces = faces_pyvista(tri_filtre)
 
-    maillage = pv.PolyData(points, faces)
+    # VTK référence directement le tableau des points : copie modifiable,
+    # les points du cache MED étant en lecture seule
+    maillage = pv.PolyData(np.array(points), faces)
 
     afficheur = pv.Plotter(title="Visualisation MED")
     afficheur.add_mesh(maillage, show_edges=True)